@@ -0,0 +1,39 @@
+"""add upload blobs table
+
+Revision ID: 0b6e1d9c4a25
+Revises: 9d3b6f1e2a70
+Create Date: 2025-10-12 11:04:37.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b6e1d9c4a25'
+down_revision: Union[str, Sequence[str], None] = '9d3b6f1e2a70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('upload_blobs',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('path', sa.String(), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('content_type', sa.String(length=50), nullable=False),
+    sa.Column('refcount', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    op.create_index('ix_upload_blobs_unreferenced', 'upload_blobs', ['sha256'], unique=False, postgresql_where=sa.text('refcount = 0'))
+    # Existing images keep their names and URLs until dedupe_uploads.py moves them
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_upload_blobs_unreferenced', table_name='upload_blobs', postgresql_where=sa.text('refcount = 0'))
+    op.drop_table('upload_blobs')
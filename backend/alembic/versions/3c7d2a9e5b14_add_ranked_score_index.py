@@ -0,0 +1,31 @@
+"""add ranked score index to complaints
+
+Revision ID: 3c7d2a9e5b14
+Revises: f4c0669f4bcd
+Create Date: 2025-10-02 11:24:51.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7d2a9e5b14'
+down_revision: Union[str, Sequence[str], None] = 'f4c0669f4bcd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_complaints_status_score_id', 'complaints',
+        ['status', sa.text('score DESC'), 'id'], unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_complaints_status_score_id', table_name='complaints')
@@ -0,0 +1,29 @@
+"""add thumbnail url to complaints
+
+Revision ID: 5f2c8a1e7b39
+Revises: 0b6e1d9c4a25
+Create Date: 2025-10-13 09:48:12.306551
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f2c8a1e7b39'
+down_revision: Union[str, Sequence[str], None] = '0b6e1d9c4a25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('complaints', sa.Column('thumbnail_url', sa.String(), nullable=True))
+    # Existing images get theirs from backfill_thumbnails.py
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('complaints', 'thumbnail_url')
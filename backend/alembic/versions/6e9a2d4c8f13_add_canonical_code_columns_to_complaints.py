@@ -0,0 +1,51 @@
+"""add canonical code columns to complaints
+
+Revision ID: 6e9a2d4c8f13
+Revises: c1f5a7e30d92
+Create Date: 2025-10-10 11:05:27.843119
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e9a2d4c8f13'
+down_revision: Union[str, Sequence[str], None] = 'c1f5a7e30d92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # One spelling per status from now on (votes used to write 'resolved')
+    op.execute("UPDATE complaints SET status = 'Resolved' WHERE lower(btrim(status)) = 'resolved' AND status <> 'Resolved'")
+    op.execute("UPDATE complaints SET status = 'Unresolved' WHERE lower(btrim(status)) = 'unresolved' AND status <> 'Unresolved'")
+
+    op.add_column('complaints', sa.Column('status_code', sa.SmallInteger(), sa.Computed("CASE lower(btrim(COALESCE(status, ''))) WHEN '' THEN 0 WHEN 'resolved' THEN 1 WHEN 'unresolved' THEN 0 ELSE NULL END", persisted=True), nullable=True))
+    op.add_column('complaints', sa.Column('process_code', sa.SmallInteger(), sa.Computed("CASE lower(btrim(COALESCE(process, ''))) WHEN '' THEN 0 WHEN 'assigned' THEN 1 WHEN 'community verified' THEN 5 WHEN 'community_verified' THEN 5 WHEN 'complaint sent' THEN 4 WHEN 'complaint_sent' THEN 4 WHEN 'in progress' THEN 2 WHEN 'in_progress' THEN 2 WHEN 'pending verification' THEN 3 WHEN 'pending_verification' THEN 3 WHEN 'unassigned' THEN 0 WHEN 'verified resolved' THEN 6 WHEN 'verified_resolved' THEN 6 WHEN 'work has started' THEN 2 ELSE NULL END", persisted=True), nullable=True))
+    op.add_column('complaints', sa.Column('priority_code', sa.SmallInteger(), sa.Computed("CASE lower(btrim(COALESCE(priority, ''))) WHEN '' THEN 0 WHEN 'critical' THEN 4 WHEN 'high' THEN 3 WHEN 'low' THEN 1 WHEN 'medium' THEN 2 WHEN 'none' THEN 0 ELSE NULL END", persisted=True), nullable=True))
+    op.add_column('complaints', sa.Column('department_code', sa.SmallInteger(), sa.Computed("CASE lower(btrim(COALESCE(department, ''))) WHEN '' THEN 0 WHEN 'bridge' THEN 8 WHEN 'bridges' THEN 8 WHEN 'electricity' THEN 2 WHEN 'government building' THEN 7 WHEN 'government buildings' THEN 7 WHEN 'govt buildings' THEN 7 WHEN 'other' THEN 0 WHEN 'park' THEN 6 WHEN 'parks' THEN 6 WHEN 'road' THEN 1 WHEN 'road safety' THEN 1 WHEN 'roads' THEN 1 WHEN 'sanitation' THEN 4 WHEN 'solid waste' THEN 5 WHEN 'waste' THEN 5 WHEN 'waste management' THEN 5 WHEN 'water' THEN 3 ELSE 0 END", persisted=True), nullable=True))
+
+    op.drop_index('ix_complaints_status_score_id', table_name='complaints')
+    op.drop_index('ix_complaints_process_created_at_id', table_name='complaints')
+    op.create_index('ix_complaints_unresolved_score_id', 'complaints', [sa.text('score DESC'), 'id'], unique=False, postgresql_where=sa.text('status_code = 0'))
+    op.create_index('ix_complaints_process_code_created_at_id', 'complaints', ['process_code', 'created_at', 'id'], unique=False)
+    op.create_index('ix_complaints_status_department_created_at_id', 'complaints', ['status_code', 'department_code', 'created_at', 'id'], unique=False)
+    op.create_index('ix_complaints_unresolved_priority_created_at_id', 'complaints', ['priority_code', 'created_at', 'id'], unique=False, postgresql_where=sa.text('status_code = 0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_complaints_unresolved_priority_created_at_id', table_name='complaints', postgresql_where=sa.text('status_code = 0'))
+    op.drop_index('ix_complaints_status_department_created_at_id', table_name='complaints')
+    op.drop_index('ix_complaints_process_code_created_at_id', table_name='complaints')
+    op.drop_index('ix_complaints_unresolved_score_id', table_name='complaints', postgresql_where=sa.text('status_code = 0'))
+    op.create_index('ix_complaints_process_created_at_id', 'complaints', ['process', 'created_at', 'id'], unique=False)
+    op.create_index('ix_complaints_status_score_id', 'complaints', ['status', sa.text('score DESC'), 'id'], unique=False)
+    op.drop_column('complaints', 'department_code')
+    op.drop_column('complaints', 'priority_code')
+    op.drop_column('complaints', 'process_code')
+    op.drop_column('complaints', 'status_code')
@@ -0,0 +1,31 @@
+"""cache location score on complaints
+
+Revision ID: 8b1e6f0c2d47
+Revises: 3c7d2a9e5b14
+Create Date: 2025-10-03 09:12:37.604112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b1e6f0c2d47'
+down_revision: Union[str, Sequence[str], None] = '3c7d2a9e5b14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows stay NULL (scored live) until `python import_pois.py --backfill-only`
+    op.add_column('complaints', sa.Column('location_score', sa.Integer(), nullable=True))
+    op.add_column('complaints', sa.Column('location_poi_type', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('complaints', 'location_poi_type')
+    op.drop_column('complaints', 'location_score')
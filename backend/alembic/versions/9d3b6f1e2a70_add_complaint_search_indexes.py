@@ -0,0 +1,34 @@
+"""add complaint search indexes
+
+Revision ID: 9d3b6f1e2a70
+Revises: 6e9a2d4c8f13
+Create Date: 2025-10-10 17:22:51.094672
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3b6f1e2a70'
+down_revision: Union[str, Sequence[str], None] = '6e9a2d4c8f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column('complaints', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed("setweight(to_tsvector('english'::regconfig, COALESCE(title, '')), 'A') || setweight(to_tsvector('english'::regconfig, COALESCE(description, '')), 'B')", persisted=True), nullable=True))
+    op.create_index('ix_complaints_search_vector', 'complaints', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_complaints_title_trgm', 'complaints', ['title'], unique=False, postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_complaints_title_trgm', table_name='complaints', postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'})
+    op.drop_index('ix_complaints_search_vector', table_name='complaints', postgresql_using='gin')
+    op.drop_column('complaints', 'search_vector')
@@ -0,0 +1,32 @@
+"""add keyset pagination indexes
+
+Revision ID: a4f8e2b7c913
+Revises: d5a93c61e7f2
+Create Date: 2025-10-06 10:05:48.227631
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4f8e2b7c913'
+down_revision: Union[str, Sequence[str], None] = 'd5a93c61e7f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_complaints_created_at_id', 'complaints', ['created_at', 'id'], unique=False)
+    op.create_index('ix_complaints_process_created_at_id', 'complaints', ['process', 'created_at', 'id'], unique=False)
+    op.create_index('ix_verified_issues_created_at_id', 'verified_issues', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_verified_issues_created_at_id', table_name='verified_issues')
+    op.drop_index('ix_complaints_process_created_at_id', table_name='complaints')
+    op.drop_index('ix_complaints_created_at_id', table_name='complaints')
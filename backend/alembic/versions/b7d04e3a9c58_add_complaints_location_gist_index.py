@@ -0,0 +1,32 @@
+"""add complaints location gist index
+
+Revision ID: b7d04e3a9c58
+Revises: e2c47b9a1f06
+Create Date: 2025-10-09 10:12:44.318205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d04e3a9c58'
+down_revision: Union[str, Sequence[str], None] = 'e2c47b9a1f06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # GeoAlchemy2 creates this index with create_all; make sure databases built
+    # another way have it too, since /complaints/map and the tiles rely on it.
+    op.execute(
+    "CREATE INDEX IF NOT EXISTS idx_complaints_location ON complaints USING gist (location)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Left in place: it predates this revision on databases built with create_all
+    pass
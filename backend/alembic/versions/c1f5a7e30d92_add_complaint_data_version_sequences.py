@@ -0,0 +1,30 @@
+"""add complaint data version sequences
+
+Revision ID: c1f5a7e30d92
+Revises: b7d04e3a9c58
+Create Date: 2025-10-09 16:47:03.559120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c1f5a7e30d92'
+down_revision: Union[str, Sequence[str], None] = 'b7d04e3a9c58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.schema.CreateSequence(sa.Sequence('complaints_data_version')))
+    op.execute(sa.schema.CreateSequence(sa.Sequence('verified_issues_data_version')))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(sa.schema.DropSequence(sa.Sequence('verified_issues_data_version')))
+    op.execute(sa.schema.DropSequence(sa.Sequence('complaints_data_version')))
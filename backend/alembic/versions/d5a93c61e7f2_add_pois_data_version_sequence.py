@@ -0,0 +1,28 @@
+"""add pois data version sequence
+
+Revision ID: d5a93c61e7f2
+Revises: 8b1e6f0c2d47
+Create Date: 2025-10-04 16:40:12.918374
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a93c61e7f2'
+down_revision: Union[str, Sequence[str], None] = '8b1e6f0c2d47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.schema.CreateSequence(sa.Sequence('pois_data_version')))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(sa.schema.DropSequence(sa.Sequence('pois_data_version')))
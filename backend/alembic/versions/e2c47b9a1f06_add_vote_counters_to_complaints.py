@@ -0,0 +1,43 @@
+"""add vote counters to complaints
+
+Revision ID: e2c47b9a1f06
+Revises: a4f8e2b7c913
+Create Date: 2025-10-07 14:31:09.502786
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c47b9a1f06'
+down_revision: Union[str, Sequence[str], None] = 'a4f8e2b7c913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('complaints', sa.Column('resolved_votes', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('complaints', sa.Column('not_resolved_votes', sa.Integer(), server_default='0', nullable=False))
+    # Seed the counters from the votes already cast
+    op.execute("""
+        UPDATE complaints c
+        SET resolved_votes = v.resolved, not_resolved_votes = v.not_resolved
+        FROM (
+            SELECT complaint_id,
+                   COUNT(*) FILTER (WHERE vote_type = 'resolved') AS resolved,
+                   COUNT(*) FILTER (WHERE vote_type = 'not_resolved') AS not_resolved
+            FROM votes
+            GROUP BY complaint_id
+        ) v
+        WHERE c.id = v.complaint_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('complaints', 'not_resolved_votes')
+    op.drop_column('complaints', 'resolved_votes')
@@ -0,0 +1,74 @@
+# backend/backfill_thumbnails.py
+"""
+Makes the thumbnail / medium copies (see derivatives.py) of every complaint
+image that does not have them yet and sets complaints.thumbnail_url. Covers
+images uploaded before derivatives existed and any the live pool dropped
+when its queue was full. Works with both content-addressed and older file
+names; it is safe to run again, and to run while the API is up.
+
+    python backfill_thumbnails.py
+    python backfill_thumbnails.py --workers 8
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import text
+
+from config import settings
+from database import SessionLocal
+import data_changes
+import derivatives
+import uploads
+
+
+def _prepare(image_url):
+    """(image_url, sha256, error): makes the derivatives of one image unless they exist."""
+    path = os.path.join(settings.UPLOAD_DIR, image_url[len(uploads.URL_PREFIX):])
+    if not os.path.exists(path):
+        return image_url, None, "missing"
+    sha256 = uploads.blob_sha256(image_url)
+    if sha256 is None:
+        sha256, kind = uploads.hash_file(path)
+        if kind is None:
+            return image_url, None, "not an image"
+    try:
+        if not derivatives.exists(sha256):
+            derivatives.generate(path, sha256)
+    except Exception as exc:
+        return image_url, None, str(exc)
+    return image_url, sha256, None
+
+
+def run(workers):
+    db = SessionLocal()
+    try:
+        image_urls = db.execute(text("""
+            SELECT DISTINCT image_url FROM complaints
+            WHERE image_url LIKE :prefix AND thumbnail_url IS NULL
+        """), {"prefix": uploads.URL_PREFIX + "%"}).scalars().all()
+        print(f"{len(image_urls)} images without thumbnails, {workers} workers")
+
+        start = time.perf_counter()
+        updated = failed = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for image_url, sha256, error in pool.map(_prepare, image_urls):
+                if error:
+                    failed += 1
+                    print(f"  skipped {image_url}: {error}")
+                    continue
+                updated += derivatives.record(db, image_url, sha256)
+                db.commit()
+        if updated:
+            data_changes.complaints_changed(db, points=[])
+        print(f"{updated} complaints updated, {failed} images skipped in {time.perf_counter() - start:.1f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+    run(args.workers)
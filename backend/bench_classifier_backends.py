@@ -0,0 +1,88 @@
+# backend/bench_classifier_backends.py
+"""
+Per-image latency and memory of each classifier backend (see
+classifier_backends.py): keras under full TensorFlow against the quantized
+TFLite model. Each backend runs in its own fresh process and reports load
+time, peak RSS once loaded and after inference, p50/p95 latency of single
+images and per-image cost at --batch.
+
+Inputs are real uploads run through image_classifier.preprocess; decoding
+is not part of the timings.
+
+    python bench_classifier_backends.py
+    python bench_classifier_backends.py --runs 500 --batch 16 --backends tflite
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+CHILD = r"""
+import json, resource, statistics, sys, time
+import numpy as np
+
+def rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+images_dir, runs, batch_size = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+import classifier_backends, image_classifier
+from bench_inference import load_images
+from config import settings
+
+inputs = [image_classifier.preprocess(data) for data in load_images(images_dir, limit=batch_size)]
+base_rss = rss_mb()
+start = time.perf_counter()
+model = classifier_backends.load_backend(settings.CLASSIFIER_BACKEND)
+result = {"load_s": time.perf_counter() - start, "loaded_rss_mb": rss_mb(), "base_rss_mb": base_rss}
+
+model.predict(inputs[0][None])  # first call builds / allocates
+timings = []
+for i in range(runs):
+    single = inputs[i % len(inputs)][None]
+    start = time.perf_counter()
+    model.predict(single)
+    timings.append((time.perf_counter() - start) * 1000)
+timings.sort()
+batch = np.stack([inputs[i % len(inputs)] for i in range(batch_size)])
+model.predict(batch)
+start = time.perf_counter()
+for _ in range(max(1, runs // batch_size)):
+    model.predict(batch)
+per_image = (time.perf_counter() - start) * 1000 / (max(1, runs // batch_size) * batch_size)
+result.update(p50_ms=statistics.median(timings), p95_ms=timings[int(len(timings) * 0.95)],
+              batch_per_image_ms=per_image, peak_rss_mb=rss_mb())
+print(json.dumps(result))
+"""
+
+
+def measure(backend, images, runs, batch):
+    env = dict(os.environ, CLASSIFIER_BACKEND=backend)
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, images, str(runs), str(batch)],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def run(backends, images, runs, batch):
+    print(f"{runs} single-image runs, batch {batch}, images from {images}\n")
+    print(f"{'backend':>8} | {'load s':>6} | {'model MB':>8} | {'peak MB':>7} | {'p50 ms':>7} | "
+          f"{'p95 ms':>7} | {'ms/img @batch':>13}")
+    print("-" * 76)
+    for backend in backends:
+        r = measure(backend, images, runs, batch)
+        print(f"{backend:>8} | {r['load_s']:>6.2f} | {r['loaded_rss_mb'] - r['base_rss_mb']:>8.0f} | "
+              f"{r['peak_rss_mb']:>7.0f} | {r['p50_ms']:>7.2f} | {r['p95_ms']:>7.2f} | "
+              f"{r['batch_per_image_ms']:>13.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="keras,tflite")
+    parser.add_argument("--images", default="uploads")
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=16)
+    args = parser.parse_args()
+    run(args.backends.split(","), args.images, args.runs, args.batch)
@@ -0,0 +1,106 @@
+# backend/bench_inference.py
+"""
+Throughput and latency of the issue classifier under concurrent uploads:
+`--concurrency` requests in flight at once, `--requests` in total, over the
+images in `--images` (default: the uploads directory). Compares
+
+  inline     model.predict on the event loop, one image per call (the old handler)
+  threadpool one image per call, in the threadpool
+  batched    image_classifier.classify: micro-batches on the classifier thread,
+             for each --batch-sizes value with --wait-ms
+
+and reports images/sec with p50/p99/max latency per request. Inline requests
+run one after another with the event loop blocked, so their latencies look
+short; compare throughput. Needs the configured classifier model.
+
+    python bench_inference.py
+    python bench_inference.py --concurrency 50 --requests 1000 --batch-sizes 8,16,32 --wait-ms 5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+import image_classifier
+
+
+def load_images(directory, limit=64):
+    images = []
+    for dirpath, _, filenames in os.walk(directory):
+        for name in sorted(filenames):
+            if name.lower().endswith((".jpg", ".jpeg", ".png", ".webp")):
+                with open(os.path.join(dirpath, name), "rb") as f:
+                    images.append(f.read())
+            if len(images) >= limit:
+                return images
+    return images
+
+
+async def inline(image_bytes):
+    return image_classifier.predict_issue_from_image_tf(image_bytes)
+
+
+async def threadpool(image_bytes):
+    return await run_in_threadpool(image_classifier.predict_issue_from_image_tf, image_bytes)
+
+
+async def drive(call, images, concurrency, requests):
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with gate:
+            start = time.perf_counter()
+            await call(images[i % len(images)])
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def report(name, elapsed, latencies):
+    def ms(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    print(f"{name:>18} | {len(latencies) / elapsed:>8.1f} | {statistics.median(latencies) * 1000:>7.1f} | "
+          f"{ms(0.99):>7.1f} | {latencies[-1] * 1000:>7.1f}")
+
+
+async def run(images, concurrency, requests, batch_sizes, wait_ms):
+    print(f"{len(images)} images, {requests} requests, {concurrency} in flight\n")
+    print(f"{'mode':>18} | {'img/s':>8} | {'p50 ms':>7} | {'p99 ms':>7} | {'max ms':>7}")
+    print("-" * 60)
+    await drive(threadpool, images, concurrency, concurrency)  # warm up graph / kernels
+    for name, call in (("inline", inline), ("threadpool", threadpool)):
+        report(name, *await drive(call, images, concurrency, requests))
+    for batch_size in batch_sizes:
+        image_classifier.start_batcher(batch_size, wait_ms)
+        try:
+            elapsed, latencies = await drive(image_classifier.classify, images, concurrency, requests)
+            mean_batch = image_classifier.status()["batching"]["recent_mean_batch_size"]
+        finally:
+            image_classifier.stop_batcher()
+        report(f"batched {batch_size}/{wait_ms:g}ms", elapsed, latencies)
+        print(f"{'':>18}   mean batch {mean_batch}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", default="uploads")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--batch-sizes", default="1,8,16,32")
+    parser.add_argument("--wait-ms", type=float, default=10)
+    args = parser.parse_args()
+
+    if image_classifier.load() is None:
+        raise SystemExit(f"classifier not available: {image_classifier.status()['error']}")
+    images = load_images(args.images)
+    if not images:
+        raise SystemExit(f"no images found in {args.images}")
+    asyncio.run(run(images, args.concurrency, args.requests,
+                    [int(size) for size in args.batch_sizes.split(",")], args.wait_ms))
@@ -0,0 +1,89 @@
+# backend/bench_preprocess.py
+"""
+Cost of turning an upload into the classifier's input across typical upload
+sizes: the keras-equivalent full decode (load_img + img_to_array + /255 +
+expand_dims, reproduced here as `legacy_preprocess`) against
+image_classifier.decode + to_input (JPEG draft-mode decode, EXIF orientation,
+scaled straight into a preallocated batch buffer).
+
+Test images are one real upload (the first in --images) resized to each size
+and saved as a JPEG (quality 90, EXIF "rotate 90" so the orientation path is
+exercised), plus one PNG, which has no reduced-scale decode.
+
+    python bench_preprocess.py
+    python bench_preprocess.py --runs 50 --images path/to/photos
+"""
+import argparse
+import io
+import statistics
+import time
+
+import numpy as np
+from PIL import Image
+
+import image_classifier
+from bench_inference import load_images
+
+SIZES = (
+    ("VGA", (640, 480), "JPEG"),
+    ("2 MP", (1600, 1200), "JPEG"),
+    ("8 MP", (3264, 2448), "JPEG"),
+    ("12 MP phone", (4032, 3024), "JPEG"),
+    ("48 MP phone", (8064, 6048), "JPEG"),
+    ("2 MP PNG", (1600, 1200), "PNG"),
+)
+EXIF_ORIENTATION = 0x0112
+
+
+def legacy_preprocess(image_bytes):
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        img = img.convert("RGB").resize(image_classifier.INPUT_SIZE, Image.NEAREST)
+    return np.expand_dims(np.asarray(img, dtype=np.float32) / 255.0, axis=0)
+
+
+def make_upload(source, size, image_format):
+    buffer = io.BytesIO()
+    img = source.resize(size, Image.LANCZOS)
+    if image_format == "JPEG":
+        exif = Image.Exif()
+        exif[EXIF_ORIENTATION] = 6
+        img.save(buffer, "JPEG", quality=90, exif=exif)
+    else:
+        img.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def timed(fn, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def run(images_dir, runs):
+    samples = load_images(images_dir, limit=1)
+    if not samples:
+        raise SystemExit(f"no images found in {images_dir}")
+    source = Image.open(io.BytesIO(samples[0])).convert("RGB")
+    batch = np.empty((1,) + image_classifier.INPUT_SIZE[::-1] + (3,), dtype=np.float32)
+
+    print(f"median of {runs} runs per size\n")
+    print(f"{'upload':>12} | {'size':>11} | {'KiB':>6} | {'legacy ms':>9} | {'draft ms':>8} | {'speedup':>7}")
+    print("-" * 68)
+    for name, size, image_format in SIZES:
+        data = make_upload(source, size, image_format)
+        n = max(3, runs // 4) if size[0] * size[1] > 20_000_000 else runs
+        legacy = timed(lambda: legacy_preprocess(data), n)
+        current = timed(lambda: image_classifier.to_input(image_classifier.decode(data), batch[0]), n)
+        print(f"{name:>12} | {size[0]:>5}x{size[1]:<5} | {len(data) / 1024:>6.0f} | {legacy:>9.1f} | "
+              f"{current:>8.1f} | {legacy / current:>6.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", default="uploads")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    run(args.images, args.runs)
@@ -0,0 +1,127 @@
+# backend/bench_ranking.py
+"""
+Benchmarks per-row scoring (calculate_priority_score) against the set-based
+batch scorer (calculate_priority_scores) on synthetic complaint backlogs, and
+the vectorized scoring kernel against the per-row formula.
+
+Everything is inserted inside one transaction that is rolled back at the end,
+so the benchmark never leaves data behind.
+
+    python bench_ranking.py                      # 1k, 10k and 100k complaints
+    python bench_ranking.py --sizes 1000 5000 --per-row-limit 2000
+    python bench_ranking.py --kernel-only        # in-memory scoring kernel, no database
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy import insert
+
+from database import SessionLocal
+import models
+import ranking_service
+
+# Same Mumbai clusters as seed.py so complaints land near real POIs
+CLUSTERS = [
+    (19.0596, 72.8295), (18.9220, 72.8347), (19.1136, 72.8697),
+    (19.0213, 72.8424), (19.2183, 72.9781),
+]
+DEPARTMENTS = ["Roads", "Sanitation", "Electricity", "Water", "Waste"]
+
+
+def insert_synthetic_complaints(db, count):
+    rows = []
+    for i in range(count):
+        lat, lon = random.choice(CLUSTERS)
+        lat += random.uniform(-0.02, 0.02)
+        lon += random.uniform(-0.02, 0.02)
+        rows.append({
+            "title": f"Benchmark complaint {i}",
+            "description": "Synthetic complaint generated by bench_ranking.py",
+            "department": random.choice(DEPARTMENTS),
+            "status": "Unresolved",
+            "location": f"SRID=4326;POINT({lon} {lat})",
+            "locationName": "benchmark",
+            # Some not_resolved votes so the vote component is exercised too
+            "not_resolved_votes": random.choice([0] * 9 + [1, 2, 3]),
+        })
+    ids = db.execute(insert(models.Complaint).returning(models.Complaint.id), rows).scalars().all()
+    db.flush()
+    return ids
+
+
+def bench_per_row(db, ids, limit):
+    sample = ids if len(ids) <= limit else random.sample(ids, limit)
+    complaints = db.query(models.Complaint).filter(models.Complaint.id.in_(sample)).all()
+    start = time.perf_counter()
+    scores = {c.id: ranking_service.calculate_priority_score(c, db) for c in complaints}
+    elapsed = time.perf_counter() - start
+    # Extrapolate when only a sample was scored
+    return scores, elapsed * len(ids) / len(sample), len(sample) < len(ids)
+
+
+def bench_batch(db, ids):
+    start = time.perf_counter()
+    scores = ranking_service.calculate_priority_scores(db, complaint_ids=ids)
+    return scores, time.perf_counter() - start
+
+
+def bench_kernel(sizes):
+    """Times the vectorized scoring kernel against the per-row Python formula (no database)."""
+    print(f"{'complaints':>10} | {'python (ms)':>12} | {'kernel (ms)':>12} | {'speedup':>8} | parity")
+    print("-" * 64)
+    departments_pool = DEPARTMENTS + [None, "Unknown"]
+    location_pool = [0] + sorted(set(ranking_service.LOCATION_SCORES.values()))
+    for size in sizes:
+        departments = [random.choice(departments_pool) for _ in range(size)]
+        votes = [random.randint(0, 8) for _ in range(size)]
+        locations = [random.choice(location_pool) for _ in range(size)]
+
+        start = time.perf_counter()
+        expected = [ranking_service._weighted_score(d, v, l) for d, v, l in zip(departments, votes, locations)]
+        python_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        mapping = ranking_service.SEVERITY_MAPPING
+        codes = ranking_service.encode_departments(departments, mapping)
+        scores, _ = ranking_service.score_arrays(codes, votes, locations, mapping)
+        kernel_time = time.perf_counter() - start
+
+        parity = "ok" if scores.tolist() == expected else "mismatch"
+        print(f"{size:>10} | {python_time * 1000:>12.1f} | {kernel_time * 1000:>12.1f} | "
+              f"{python_time / kernel_time:>7.1f}x | {parity}")
+    print()
+
+
+def run(sizes, per_row_limit):
+    print(f"{'complaints':>10} | {'per-row (s)':>12} | {'batch (s)':>10} | {'speedup':>8} | parity")
+    print("-" * 62)
+    for size in sizes:
+        db = SessionLocal()
+        try:
+            ids = insert_synthetic_complaints(db, size)
+            row_scores, row_time, extrapolated = bench_per_row(db, ids, per_row_limit)
+            batch_scores, batch_time = bench_batch(db, ids)
+            mismatches = [cid for cid, score in row_scores.items() if batch_scores.get(cid) != score]
+            parity = "ok" if not mismatches else f"{len(mismatches)} mismatches"
+            marker = "*" if extrapolated else " "
+            print(f"{size:>10} | {row_time:>11.2f}{marker} | {batch_time:>10.3f} | "
+                  f"{row_time / batch_time:>7.1f}x | {parity}")
+        finally:
+            db.rollback()
+            db.close()
+    print("\n* per-row time extrapolated from a random sample of "
+          f"{per_row_limit} complaints (use --per-row-limit to change)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--per-row-limit", type=int, default=10000,
+                        help="Max complaints scored one by one before extrapolating")
+    parser.add_argument("--kernel-only", action="store_true",
+                        help="Only benchmark the in-memory scoring kernel")
+    args = parser.parse_args()
+    bench_kernel(args.sizes)
+    if not args.kernel_only:
+        run(args.sizes, args.per_row_limit)
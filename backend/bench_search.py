@@ -0,0 +1,92 @@
+# backend/bench_search.py
+"""
+Measures /complaints/search latency (search_service.search) on a synthetic
+backlog: p50/p95/max per query over several runs, full-text and fuzzy, with
+and without department/status filters.
+
+Everything is inserted inside one transaction that is rolled back at the end,
+so the benchmark never leaves data behind.
+
+    python bench_search.py                    # 1,000,000 complaints
+    python bench_search.py --rows 200000 --runs 50
+"""
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import insert, text
+
+from database import SessionLocal
+import models
+import search_service
+
+ISSUES = {
+    "Roads": ["pothole", "cracked road surface", "damaged footpath", "broken speed breaker", "waterlogging"],
+    "Electricity": ["streetlight outage", "flickering streetlight", "exposed wiring", "fallen electric pole"],
+    "Water": ["pipe burst", "leaking tap", "contaminated water supply", "low water pressure"],
+    "Sanitation": ["overflowing bin", "clogged drain", "open sewer", "garbage not cleared"],
+    "Waste": ["illegal dumping", "construction debris", "burning garbage", "no segregation bins"],
+}
+PLACES = ["near the market", "outside the school", "opposite the hospital", "at the bus stop",
+          "behind the temple", "on the main road", "next to the park", "by the railway station"]
+QUERIES = [
+    ("full-text", "pothole", [], []),
+    ("full-text phrase", '"clogged drain"', [], []),
+    ("full-text + filters", "streetlight", ["Electricity"], ["Unresolved"]),
+    ("full-text OR", "pipe or leaking", [], []),
+    ("fuzzy (typo)", "pothol", [], []),
+    ("fuzzy (typo) + filter", "streetlite", ["Electricity"], []),
+]
+
+
+def insert_synthetic_complaints(db, count, chunk=50000):
+    for start in range(0, count, chunk):
+        rows = []
+        for _ in range(min(chunk, count - start)):
+            department = random.choice(list(ISSUES))
+            issue = random.choice(ISSUES[department])
+            place = random.choice(PLACES)
+            rows.append({
+                "title": f"{issue.capitalize()} {place}",
+                "description": f"Residents report {issue} {place}. It has been like this for "
+                               f"{random.randint(2, 30)} days and is getting worse.",
+                "department": department,
+                "status": random.choice(["Unresolved"] * 4 + ["Resolved"]),
+                "location": "SRID=4326;POINT(72.8295 19.0596)",
+                "locationName": "benchmark",
+            })
+        db.execute(insert(models.Complaint), rows)
+    db.execute(text("ANALYZE complaints"))
+
+
+def run(rows, runs, limit):
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        insert_synthetic_complaints(db, rows)
+        print(f"inserted {rows} complaints in {time.perf_counter() - start:.1f}s, {runs} runs per query\n")
+        print(f"{'query':>24} | {'mode':>8} | {'hits':>5} | {'p50 ms':>7} | {'p95 ms':>7} | {'max ms':>7}")
+        print("-" * 72)
+        for name, q, departments, statuses in QUERIES:
+            timings = []
+            for _ in range(runs):
+                t0 = time.perf_counter()
+                hits, _, mode = search_service.search(db, q, departments, statuses, limit, None)
+                timings.append((time.perf_counter() - t0) * 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(f"{name:>24} | {mode:>8} | {len(hits):>5} | {statistics.median(timings):>7.1f} | "
+                  f"{p95:>7.1f} | {timings[-1]:>7.1f}")
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    run(args.rows, args.runs, args.limit)
@@ -0,0 +1,103 @@
+# backend/bench_serializer.py
+"""
+Compares the complaint list serializers on a synthetic backlog: the previous
+path (ORM entities, to_shape + mapping per row) against serializers.py
+(Core rows with ST_X/ST_Y, one dict per row). Reports total time, per-row
+cost and peak Python memory (tracemalloc) for each.
+
+Everything is inserted inside one transaction that is rolled back at the end,
+so the benchmark never leaves data behind.
+
+    python bench_serializer.py                 # 100k complaints
+    python bench_serializer.py --rows 20000 --repeat 5
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from geoalchemy2.shape import to_shape
+from shapely.geometry import mapping
+
+from database import SessionLocal
+import models
+import serializers
+from bench_ranking import insert_synthetic_complaints
+
+
+def legacy_serialize(db, ids):
+    """The /complaints/all loop as it was before serializers.py."""
+    complaints = db.query(models.Complaint).filter(models.Complaint.id.in_(ids)).all()
+    result = []
+    for c in complaints:
+        geom = to_shape(c.location) if c.location else None
+        result.append({
+            "id": c.id,
+            "title": c.title,
+            "description": c.description,
+            "department": c.department,
+            "status": c.status,
+            "process": c.process,
+            "image_url": c.image_url,
+            "location": mapping(geom) if geom else None,
+            "created_at": c.created_at.isoformat() if c.created_at else None,
+            "locationName": c.locationName
+        })
+    return result
+
+
+def core_serialize(db, ids):
+    fields = serializers.COMPLAINT_LIST_FIELDS
+    stmt = serializers.select_fields(models.Complaint, fields).where(models.Complaint.id.in_(ids))
+    return serializers.serialize_rows(db.execute(stmt).all(), fields)
+
+
+def measure(fn, db, ids, repeat):
+    best = None
+    for _ in range(repeat):
+        # Start each pass with an empty identity map so ORM rows are really rebuilt
+        db.expunge_all()
+        gc.collect()
+        start = time.perf_counter()
+        result = fn(db, ids)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    db.expunge_all()
+    gc.collect()
+    tracemalloc.start()
+    result = fn(db, ids)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def run(rows, repeat):
+    db = SessionLocal()
+    try:
+        ids = insert_synthetic_complaints(db, rows)
+        db.expunge_all()
+        print(f"{rows} complaints, best of {repeat}\n")
+        print(f"{'path':>8} | {'total (s)':>10} | {'per row (us)':>12} | {'peak MiB':>9}")
+        print("-" * 50)
+        results = {}
+        for name, fn in (("legacy", legacy_serialize), ("core", core_serialize)):
+            result, elapsed, peak = measure(fn, db, ids, repeat)
+            results[name] = (result, elapsed)
+            print(f"{name:>8} | {elapsed:>10.3f} | {elapsed / rows * 1e6:>12.1f} | {peak / 2**20:>9.1f}")
+
+        legacy = {r["id"]: r for r in results["legacy"][0]}
+        mismatches = [r["id"] for r in results["core"][0] if legacy.get(r["id"]) != r]
+        print(f"\nspeedup: {results['legacy'][1] / results['core'][1]:.1f}x, "
+              f"parity: {'ok' if not mismatches else f'{len(mismatches)} mismatches'}")
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
@@ -0,0 +1,74 @@
+# backend/bench_startup.py
+"""
+Measures what importing the app costs with the issue classifier enabled and
+disabled: import time and peak RSS in a fresh interpreter, and with the
+classifier enabled, how long the model then takes to load and the RSS after.
+Import + load is what every worker paid at import time before the model was
+loaded lazily (see image_classifier.py).
+
+Each run is a separate `python` process started from backend/, with the
+warm-up off so the import is measured on its own.
+
+    python bench_startup.py
+    python bench_startup.py --runs 5 --module routers.autofillAi
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CHILD = r"""
+import json, resource, sys, time
+
+def rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+start = time.perf_counter()
+__import__(sys.argv[1])
+result = {"import_s": time.perf_counter() - start, "import_rss_mb": rss_mb()}
+if sys.argv[2] == "load":
+    import image_classifier
+    start = time.perf_counter()
+    image_classifier.load()
+    result.update(load_s=time.perf_counter() - start, loaded_rss_mb=rss_mb(),
+                  classifier=image_classifier.status()["status"])
+print(json.dumps(result))
+"""
+
+
+def measure(module, enabled):
+    env = dict(os.environ, CLASSIFIER_ENABLED=str(enabled).lower(), CLASSIFIER_WARMUP="false")
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, module, "load" if enabled else "skip"],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def run(module, runs):
+    print(f"importing {module!r}, median of {runs} fresh processes\n")
+    print(f"{'classifier':>10} | {'import s':>8} | {'RSS MB':>7} | {'load s':>7} | {'loaded RSS MB':>13} | state")
+    print("-" * 72)
+    for enabled in (False, True):
+        results = [measure(module, enabled) for _ in range(runs)]
+
+        def median(key):
+            values = [r[key] for r in results if key in r]
+            return statistics.median(values) if values else None
+
+        load_s, loaded_rss = median("load_s"), median("loaded_rss_mb")
+        print(f"{'enabled' if enabled else 'disabled':>10} | {median('import_s'):>8.2f} | "
+              f"{median('import_rss_mb'):>7.0f} | {'-' if load_s is None else f'{load_s:.2f}':>7} | "
+              f"{'-' if loaded_rss is None else f'{loaded_rss:.0f}':>13} | "
+              f"{results[-1].get('classifier', 'not loaded')}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main", help="module to import, as the API workers do")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    run(args.module, args.runs)
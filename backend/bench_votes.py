@@ -0,0 +1,139 @@
+# backend/bench_votes.py
+"""
+Fires parallel votes at one hot complaint and reports votes/sec for the
+single-statement vote path (vote_service.cast_vote) and for the previous
+ORM flow (select complaint, user and existing vote, insert, count, rescore,
+group-by summary), reproduced here as `legacy_vote`.
+
+Creates a temporary complaint and voters, and deletes them afterwards.
+
+    python bench_votes.py --votes 2000 --workers 32
+"""
+import argparse
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+from sqlalchemy import func, insert, text
+
+from database import SessionLocal
+from models import Complaint, User, Vote, VerifiedIssue
+import ranking_service
+import vote_service
+
+
+def legacy_vote(db, complaint_id, user_id, vote_type):
+    """The vote path as it was before vote_service: ~9 round trips per vote."""
+    complaint = db.query(Complaint).filter(Complaint.id == complaint_id).first()
+    if not complaint:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    if not db.query(User).filter(User.id == user_id).first():
+        raise HTTPException(status_code=404, detail="User not found")
+    if db.query(Vote).filter(Vote.user_id == user_id, Vote.complaint_id == complaint_id).first():
+        raise HTTPException(status_code=400, detail="User has already voted on this complaint")
+
+    db.add(Vote(user_id=user_id, complaint_id=complaint_id, vote_type=vote_type))
+    db.flush()
+    if vote_type == "not_resolved":
+        not_resolved = db.query(func.count(Vote.id)).filter(
+            Vote.complaint_id == complaint_id, Vote.vote_type == "not_resolved").scalar()
+        if not_resolved >= vote_service.PRIORITY_HIGH_THRESHOLD:
+            complaint.priority = "high"
+        location, _ = ranking_service.lookup_location_score(complaint, db)
+        complaint.score = ranking_service._weighted_score(complaint.department, not_resolved, location)
+
+    summary = dict(db.query(Vote.vote_type, func.count(Vote.id))
+                   .filter(Vote.complaint_id == complaint_id).group_by(Vote.vote_type).all())
+    if summary.get("resolved", 0) >= vote_service.RESOLVED_THRESHOLD:
+        complaint.status = "resolved"
+        if not db.query(VerifiedIssue).filter(VerifiedIssue.complaint_id == complaint_id).first():
+            db.add(VerifiedIssue(complaint_id=complaint.id, title=complaint.title,
+                                 description=complaint.description, status="verified"))
+        db.query(Vote).filter(Vote.complaint_id == complaint_id).delete(synchronize_session=False)
+    elif summary.get("not_resolved", 0) >= vote_service.NOT_RESOLVED_THRESHOLD:
+        complaint.process = "community_verified"
+        db.query(Vote).filter(Vote.complaint_id == complaint_id).delete(synchronize_session=False)
+    db.commit()
+
+
+def create_fixtures(voters):
+    db = SessionLocal()
+    try:
+        tag = uuid.uuid4().hex[:8]
+        complaint = Complaint(
+            title="Benchmark hot complaint", description="Created by bench_votes.py",
+            department="Roads", location="SRID=4326;POINT(72.8295 19.0596)", locationName="benchmark",
+        )
+        db.add(complaint)
+        db.flush()
+        ranking_service.assign_location_score(complaint, db)
+        user_ids = db.execute(insert(User).returning(User.id), [
+            {
+                "first_name": "Bench", "last_name": f"Voter{i}", "age": 30,
+                "aadhar_number": f"9{i:011d}", "email": f"bench-{tag}-{i}@example.com",
+                "phnumber": f"8{i:09d}", "password_hash": "x", "role": "citizen",
+            }
+            for i in range(voters)
+        ]).scalars().all()
+        db.commit()
+        return complaint.id, user_ids
+    finally:
+        db.close()
+
+
+def drop_fixtures(complaint_id, user_ids):
+    db = SessionLocal()
+    try:
+        db.execute(text("DELETE FROM verified_issues WHERE complaint_id = :id"), {"id": complaint_id})
+        db.execute(text("DELETE FROM votes WHERE complaint_id = :id"), {"id": complaint_id})
+        db.execute(text("DELETE FROM complaints WHERE id = :id"), {"id": complaint_id})
+        db.execute(text("DELETE FROM users WHERE id = ANY(:ids)"), {"ids": list(user_ids)})
+        db.commit()
+    finally:
+        db.close()
+
+
+def fire(vote_fn, complaint_id, user_ids, workers):
+    def one(user_id):
+        db = SessionLocal()
+        try:
+            vote_fn(db, complaint_id, user_id, random.choice(("resolved", "not_resolved", "not_resolved")))
+            return True
+        except Exception:
+            db.rollback()
+            return False
+        finally:
+            db.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(one, user_ids))
+    elapsed = time.perf_counter() - start
+    return sum(results), len(results) - sum(results), elapsed
+
+
+def run(votes, workers):
+    print(f"{votes} votes, {workers} concurrent clients, one hot complaint\n")
+    print(f"{'path':>8} | {'ok':>6} | {'failed':>6} | {'seconds':>8} | {'votes/sec':>10}")
+    print("-" * 52)
+    rates = {}
+    for name, vote_fn in (("legacy", legacy_vote), ("new", vote_service.cast_vote)):
+        complaint_id, user_ids = create_fixtures(votes)
+        try:
+            ok, failed, elapsed = fire(vote_fn, complaint_id, user_ids, workers)
+        finally:
+            drop_fixtures(complaint_id, user_ids)
+        rates[name] = ok / elapsed
+        print(f"{name:>8} | {ok:>6} | {failed:>6} | {elapsed:>8.2f} | {rates[name]:>10.1f}")
+    print(f"\nspeedup: {rates['new'] / rates['legacy']:.1f}x")
+    print("(failures are votes whose transaction errored, e.g. deadlocks under contention)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--votes", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=32)
+    args = parser.parse_args()
+    run(args.votes, args.workers)
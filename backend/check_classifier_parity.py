@@ -0,0 +1,71 @@
+# backend/check_classifier_parity.py
+"""
+Checks that the TFLite backend classifies like the keras reference: runs
+both (see classifier_backends.py) on every image in `--images` and compares
+the predicted label, the mapped department (labels / department_mapping, as
+/AIhelp/assist returns it) and the largest probability difference.
+
+Exits non-zero when departments agree on fewer than `--min-agreement` of the
+images, so it can gate a CLASSIFIER_BACKEND=tflite rollout.
+
+    python check_classifier_parity.py
+    python check_classifier_parity.py --images path/to/samples --tflite ml_model/issue_classifier_fp16.tflite
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from config import settings
+import classifier_backends
+import image_classifier
+
+
+def sample_images(directory):
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames[:] = [d for d in dirnames if d != "derived"]  # resized copies of the same uploads
+        for name in sorted(filenames):
+            if name.lower().endswith((".jpg", ".jpeg", ".png", ".webp")):
+                yield os.path.join(dirpath, name)
+
+
+def run(images_dir, tflite_path, min_agreement):
+    labels = image_classifier.load_labels()
+    keras = classifier_backends.KerasBackend(settings.CLASSIFIER_MODEL_PATH)
+    tflite = classifier_backends.TFLiteBackend(tflite_path)
+
+    paths = list(sample_images(images_dir))
+    if not paths:
+        sys.exit(f"no images found in {images_dir}")
+    label_matches = department_matches = 0
+    worst = 0.0
+    for path in paths:
+        with open(path, "rb") as f:
+            batch = np.expand_dims(image_classifier.preprocess(f.read()), axis=0)
+        expected, actual = keras.predict(batch), tflite.predict(batch)
+        diff = float(np.abs(expected - actual).max())
+        worst = max(worst, diff)
+        expected_label, actual_label = labels[int(expected.argmax())], labels[int(actual.argmax())]
+        expected_department = image_classifier.departments(expected, labels)[0]
+        actual_department = image_classifier.departments(actual, labels)[0]
+        label_matches += expected_label == actual_label
+        department_matches += expected_department == actual_department
+        flag = "" if expected_department == actual_department else "  <-- differs"
+        print(f"{os.path.basename(path)[:40]:>40} | {expected_label:>12} | {actual_label:>12} | "
+              f"{expected_department:>14} | {diff:.4f}{flag}")
+
+    agreement = department_matches / len(paths)
+    print(f"\n{len(paths)} images: labels agree on {label_matches}, departments on {department_matches} "
+          f"({agreement:.1%}), max probability difference {worst:.4f}")
+    if agreement < min_agreement:
+        sys.exit(f"department agreement {agreement:.1%} is below {min_agreement:.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", default=settings.UPLOAD_DIR)
+    parser.add_argument("--tflite", default=settings.CLASSIFIER_TFLITE_PATH)
+    parser.add_argument("--min-agreement", type=float, default=0.99)
+    args = parser.parse_args()
+    run(args.images, args.tflite, args.min_agreement)
@@ -0,0 +1,87 @@
+# backend/classifier_backends.py
+"""
+Inference backends for the issue classifier, chosen with CLASSIFIER_BACKEND.
+
+  keras   the trained issue_classifier.h5 under full TensorFlow; the reference
+  tflite  the same network converted by convert_classifier.py to a quantized
+          TFLite flatbuffer, run by the LiteRT interpreter (ai-edge-litert or
+          tflite-runtime, falling back to TensorFlow's own). Much smaller in
+          memory and usually faster per image on CPU, without importing
+          TensorFlow at all when a standalone runtime is installed.
+
+Both take the same (n, 224, 224, 3) float32 batch and return (n, classes)
+probabilities. check_classifier_parity.py compares them on sample images.
+"""
+import threading
+
+import numpy as np
+
+from config import settings
+
+
+class KerasBackend:
+    name = "keras"
+
+    def __init__(self, path: str):
+        import tensorflow as tf
+
+        self._model = tf.keras.models.load_model(path)
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        # A direct call instead of model.predict: no per-call dataset setup, and
+        # no retracing for every new batch size the batcher produces
+        return np.asarray(self._model(batch, training=False))
+
+
+def _tflite_interpreter():
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            try:
+                import tensorflow as tf
+            except ImportError:
+                raise RuntimeError(
+                    "CLASSIFIER_BACKEND=tflite needs a TFLite runtime (pip install ai-edge-litert) or TensorFlow"
+                )
+            Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class TFLiteBackend:
+    name = "tflite"
+
+    def __init__(self, path: str, num_threads=None):
+        self._interpreter = _tflite_interpreter()(model_path=path, num_threads=num_threads)
+        self._interpreter.allocate_tensors()
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._batch_size = self._input["shape"][0]
+        # One interpreter holds one set of tensors; the batcher thread and
+        # unbatched callers must take turns
+        self._lock = threading.Lock()
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        batch = np.ascontiguousarray(batch, dtype=self._input["dtype"])
+        with self._lock:
+            if batch.shape[0] != self._batch_size:
+                self._interpreter.resize_tensor_input(self._input["index"], batch.shape)
+                self._interpreter.allocate_tensors()
+                self._batch_size = batch.shape[0]
+            self._interpreter.set_tensor(self._input["index"], batch)
+            self._interpreter.invoke()
+            return self._interpreter.get_tensor(self._output["index"]).copy()
+
+
+BACKENDS = ("keras", "tflite")
+
+
+def load_backend(name: str):
+    """Loads the model for backend `name` from the configured path."""
+    if name == "keras":
+        return KerasBackend(settings.CLASSIFIER_MODEL_PATH)
+    if name == "tflite":
+        return TFLiteBackend(settings.CLASSIFIER_TFLITE_PATH, settings.CLASSIFIER_TFLITE_THREADS)
+    raise ValueError(f"Unknown CLASSIFIER_BACKEND {name!r}; expected one of {', '.join(BACKENDS)}")
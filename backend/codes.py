@@ -0,0 +1,121 @@
+# backend/codes.py
+"""
+Canonical codes for the complaint status / process / priority / department
+vocabularies.
+
+Different parts of the app write different spellings of the same value
+('Resolved' vs 'resolved', 'Pending Verification' vs 'pending_verification',
+'HIGH' vs 'high', 'Road Safety' vs 'Roads'). Each complaints column has a
+generated SMALLINT *_code twin computed from these tables, so filters and
+indexes work on one canonical value while the label columns (and the API)
+keep what was written.
+"""
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import and_, false, func, or_
+
+
+class Vocabulary:
+    def __init__(
+        self, column: str, labels: Dict[int, str], aliases: Dict[str, int],
+        default: int, unknown: Optional[int] = None,
+    ):
+        self.column = column
+        self.labels = labels
+        # `default` is the code of an empty value, `unknown` that of an unrecognised one
+        self.default = default
+        self.unknown = unknown
+        # Every label is its own alias; lookups are case- and whitespace-insensitive
+        self.aliases = {label.lower(): code for code, label in labels.items()}
+        self.aliases.update(aliases)
+
+    def code(self, value: Optional[str]) -> Optional[int]:
+        """Code for a value; `unknown` (None unless set) when it is not part of the vocabulary."""
+        if value is None or not value.strip():
+            return self.default
+        return self.aliases.get(value.strip().lower(), self.unknown)
+
+    def known_code(self, value: str) -> Optional[int]:
+        """Code for a recognised label or alias, None otherwise."""
+        return self.aliases.get(value.strip().lower())
+
+    def matching(self, fragment: str) -> Set[int]:
+        """Codes whose label or alias contains `fragment` (the old ilike '%x%' semantics)."""
+        fragment = fragment.strip().lower()
+        return {code for alias, code in self.aliases.items() if fragment in alias}
+
+    def code_sql(self) -> str:
+        """SQL expression computing the code from the label column (used for the generated column)."""
+        cases = " ".join(f"WHEN '{alias}' THEN {code}" for alias, code in sorted(self.aliases.items()))
+        unknown = "NULL" if self.unknown is None else self.unknown
+        return f"CASE lower(btrim(COALESCE({self.column}, ''))) WHEN '' THEN {self.default} {cases} ELSE {unknown} END"
+
+
+STATUS = Vocabulary("status", {0: "Unresolved", 1: "Resolved"}, {}, default=0)
+
+PROCESS = Vocabulary(
+    "process",
+    {
+        0: "Unassigned", 1: "Assigned", 2: "Work has started", 3: "Pending Verification",
+        4: "Complaint Sent", 5: "Community Verified", 6: "Verified Resolved",
+    },
+    {
+        "in_progress": 2, "in progress": 2, "pending_verification": 3, "complaint_sent": 4,
+        "community_verified": 5, "verified_resolved": 6,
+    },
+    default=0,
+)
+
+# Same order as map_service.PRIORITY_ORDER, so codes compare by urgency
+PRIORITY = Vocabulary("priority", {0: "none", 1: "low", 2: "medium", 3: "high", 4: "critical"}, {}, default=0)
+
+# Departments are free text at registration; anything unrecognised is code 0
+DEPARTMENT_OTHER = 0
+DEPARTMENT = Vocabulary(
+    "department",
+    {
+        DEPARTMENT_OTHER: "Other", 1: "Roads", 2: "Electricity", 3: "Water", 4: "Sanitation",
+        5: "Waste", 6: "Parks", 7: "Government Buildings", 8: "Bridges",
+    },
+    {
+        "road": 1, "road safety": 1, "waste management": 5, "solid waste": 5,
+        "park": 6, "govt buildings": 7, "government building": 7, "bridge": 8,
+    },
+    default=DEPARTMENT_OTHER,
+    unknown=DEPARTMENT_OTHER,
+)
+
+STATUS_UNRESOLVED = STATUS.code("Unresolved")
+PROCESS_PENDING_VERIFICATION = PROCESS.code("Pending Verification")
+
+
+def split_values(values: Optional[Iterable[str]]) -> List[str]:
+    """Flattens ?x=a&x=b and ?x=a,b into ['a', 'b']."""
+    return [v for value in values or () for v in value.split(",") if v.strip()]
+
+
+def code_filter(vocabulary: Vocabulary, code_column, label_column, values: List[str], partial: bool):
+    """
+    WHERE clause matching any of `values` on the indexed code column, or None
+    when there are no values. With `partial`, a value matches every label or
+    alias containing it. Values outside a free-text vocabulary (departments)
+    are matched on the label, within the rows carrying the unknown code.
+    """
+    if not values:
+        return None
+    known: Set[int] = set()
+    free_text = []
+    for value in values:
+        matched = vocabulary.matching(value) if partial else {vocabulary.known_code(value)} - {None}
+        if matched:
+            known |= matched
+        elif vocabulary.unknown is not None:
+            free_text.append(value.strip().lower())
+
+    clauses = []
+    if known:
+        clauses.append(code_column.in_(sorted(known)))
+    label = func.lower(func.btrim(label_column))
+    for value in free_text:
+        clauses.append(and_(code_column == vocabulary.unknown, label.contains(value) if partial else label == value))
+    return or_(*clauses) if clauses else false()
@@ -5,16 +5,62 @@ from typing import Optional # <-- 1. ADD THIS IMPORT
 
 class Settings(BaseSettings):
     DATABASE_URL: Optional[str] = None
+    # Connection pool (applies to both the sync and the asyncpg engine)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
     API_BASE_URL: Optional[str] = None
     ADMIN_TOKEN: Optional[str] = None
-    GROQ_API_KEY: str
+    # Only the API needs these (routers/autofillAi.py fails at import without the Groq key);
+    # migrations and offline scripts import this module too
+    GROQ_API_KEY: Optional[str] = None
     GROQ_MODEL: str = "llama-3.3-70b-versatile"
-    OPENAI_API_KEY: str
+    OPENAI_API_KEY: Optional[str] = None
 
     STATIC_DIR: str = "static"
-    UPLOAD_DIR: str = "static/uploads"
+    UPLOAD_DIR: str = "uploads"          # served at /uploads
+    # Uploads are received here until validated; not served, and must be on UPLOAD_DIR's filesystem
+    UPLOAD_STAGING_DIR: str = "uploads_incoming"
+    MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024
+    # Thumbnail / medium copies of uploads (see derivatives.py)
+    DERIVATIVE_WORKERS: int = 2
+    DERIVATIVE_QUEUE_SIZE: int = 100
     CORS_ORIGINS: str = "*"
 
+    # Issue classifier for /AIhelp/assist (see image_classifier.py)
+    CLASSIFIER_ENABLED: bool = True
+    CLASSIFIER_WARMUP: bool = True      # load in the background at startup instead of on first use
+    CLASSIFIER_MODEL_PATH: str = "ml_model/issue_classifier.h5"
+    CLASSIFIER_CLASS_INDICES_PATH: str = "ml_model/class_indices.json"
+    # keras (reference) | tflite (quantized, see convert_classifier.py and classifier_backends.py)
+    CLASSIFIER_BACKEND: str = "keras"
+    CLASSIFIER_TFLITE_PATH: str = "ml_model/issue_classifier.tflite"
+    CLASSIFIER_TFLITE_THREADS: Optional[int] = None
+    # Concurrent predictions are run together, up to this many, waiting at most this long for more
+    CLASSIFIER_BATCH_SIZE: int = 16
+    CLASSIFIER_BATCH_WAIT_MS: float = 10
+
+    # In-memory POI index for location scoring (see poi_index.py)
+    POI_INDEX_ENABLED: bool = False
+    POI_INDEX_REFRESH_SECONDS: int = 30
+
+    # JSON file with ranking weights / severity mapping (see ranking_service.load_weights)
+    RANKING_WEIGHTS_FILE: Optional[str] = None
+
+    # On-disk cache for /tiles (see tiles.py); tiles above TILE_CACHE_MAX_ZOOM are not cached, and the
+    # least recently served tiles are evicted once the cache outgrows TILE_CACHE_MAX_BYTES
+    TILE_CACHE_DIR: str = "tile_cache"
+    TILE_CACHE_MAX_ZOOM: int = 18
+    TILE_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+
+    # Response cache for the list endpoints (see response_cache.py): memory | redis | none
+    RESPONSE_CACHE_BACKEND: str = "memory"
+    RESPONSE_CACHE_TTL_SECONDS: int = 60
+    RESPONSE_CACHE_MAX_ENTRIES: int = 512
+    REDIS_URL: Optional[str] = None
+
     class Config:
         env_file = os.path.join(os.path.dirname(__file__), ".env")
         env_file_encoding = "utf-8"
@@ -0,0 +1,45 @@
+# backend/convert_classifier.py
+"""
+Converts the keras issue classifier (CLASSIFIER_MODEL_PATH) into the
+quantized TFLite model served by CLASSIFIER_BACKEND=tflite
+(CLASSIFIER_TFLITE_PATH). Needs TensorFlow; the API itself then only needs a
+TFLite runtime.
+
+  dynamic  int8 weights, float activations (default): ~4x smaller, same
+           float32 input, usually within rounding of the keras output
+  float16  float16 weights: ~2x smaller, closest to the reference
+  none     plain float32 conversion
+
+Check the result with check_classifier_parity.py before switching backends.
+
+    python convert_classifier.py
+    python convert_classifier.py --quantize float16 --output ml_model/issue_classifier_fp16.tflite
+"""
+import argparse
+import os
+
+from config import settings
+
+
+def convert(source, output, quantize):
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(tf.keras.models.load_model(source))
+    if quantize != "none":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantize == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    flatbuffer = converter.convert()
+    with open(output, "wb") as f:
+        f.write(flatbuffer)
+    print(f"{source} ({os.path.getsize(source) / 2**20:.1f} MiB) -> {output} "
+          f"({len(flatbuffer) / 2**20:.1f} MiB, {quantize})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default=settings.CLASSIFIER_MODEL_PATH)
+    parser.add_argument("--output", default=settings.CLASSIFIER_TFLITE_PATH)
+    parser.add_argument("--quantize", choices=("dynamic", "float16", "none"), default="dynamic")
+    args = parser.parse_args()
+    convert(args.source, args.output, args.quantize)
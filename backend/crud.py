@@ -1,7 +1,10 @@
 from sqlalchemy.orm import Session
 import models
-from shapely.geometry import mapping
-from geoalchemy2.shape import to_shape
+import serializers
+import uploads
+
+CRUD_LIST_FIELDS = ("id", "title", "description", "department", "status", "image_url",
+                    "thumbnail_url", "location", "created_at", "locationName")
 
 # 🔹 Create complaint
 def create_complaint(db: Session, complaint_data: dict):
@@ -13,22 +16,8 @@ def create_complaint(db: Session, complaint_data: dict):
 
 # 🔹 Get all complaints
 def get_all_complaints(db: Session):
-    complaints = db.query(models.Complaint).all()
-    result = []
-    for c in complaints:
-        geom = to_shape(c.location) if c.location else None
-        result.append({
-            "id": c.id,
-            "title": c.title,
-            "description": c.description,
-            "department": c.department,
-            "status": c.status,
-            "image_url": c.image_url,
-            "location": mapping(geom) if geom else None,
-            "created_at": c.created_at.isoformat() if c.created_at else None,
-            "locationName": c.locationName
-        })
-    return result
+    rows = db.execute(serializers.select_fields(models.Complaint, CRUD_LIST_FIELDS)).all()
+    return serializers.serialize_rows(rows, CRUD_LIST_FIELDS)
 
 # 🔹 Get one complaint
 def get_complaint(db: Session, complaint_id: int):
@@ -38,6 +27,7 @@ def get_complaint(db: Session, complaint_id: int):
 def delete_complaint(db: Session, complaint_id: int):
     complaint = get_complaint(db, complaint_id)
     if complaint:
+        uploads.release(db, complaint.image_url)
         db.delete(complaint)
         db.commit()
     return complaint
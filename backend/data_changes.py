@@ -0,0 +1,88 @@
+# backend/data_changes.py
+"""
+Single place where write paths report what they changed, after committing.
+
+Bumps the per-dataset data versions (see data_versions.py), drops the cached
+list responses built from them and invalidates the cached vector tiles that
+show the affected complaints.
+"""
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+import data_versions
+import response_cache
+import tiles
+
+Point = Tuple[float, float]
+
+
+def locate_complaints(db: Session, complaint_ids: Iterable[int]) -> List[Point]:
+    """(lon, lat) of each complaint. Call before deleting a complaint, while it still exists."""
+    ids = list(complaint_ids)
+    if not ids:
+        return []
+    rows = db.execute(text("""
+        SELECT ST_X(location::geometry), ST_Y(location::geometry)
+        FROM complaints
+        WHERE id = ANY(CAST(:ids AS integer[])) AND location IS NOT NULL
+    """), {"ids": ids}).all()
+    return [(lon, lat) for lon, lat in rows]
+
+
+def complaints_changed(
+    db: Session,
+    complaint_ids: Iterable[int] = (),
+    points: Optional[List[Point]] = None,
+    verified: bool = False,
+) -> None:
+    """
+    Records that the given complaints were inserted, updated or deleted.
+    Pass `points` for deleted complaints, whose locations can no longer be
+    looked up; `verified=True` when verified_issues changed as well.
+    Must run after the commit: sequences are not transactional.
+    """
+    if points is None:
+        points = locate_complaints(db, complaint_ids)
+    _bump_versions(db, verified)
+    _invalidate(points, verified)
+
+
+async def complaints_changed_async(
+    db: AsyncSession,
+    complaint_ids: Iterable[int] = (),
+    points: Optional[List[Point]] = None,
+    verified: bool = False,
+) -> None:
+    """
+    complaints_changed for async routes: the version bumps go through the
+    async session, the cache (possibly Redis) and tile file invalidation run
+    in the threadpool, off the event loop.
+    """
+    if points is None:
+        points = await db.run_sync(locate_complaints, list(complaint_ids))
+    await db.run_sync(_bump_versions, verified)
+    await run_in_threadpool(_invalidate, points, verified)
+
+
+def _bump_versions(db: Session, verified: bool) -> None:
+    data_versions.bump_version(db, "complaints")
+    if verified:
+        data_versions.bump_version(db, "verified_issues")
+
+
+def _invalidate(points: List[Point], verified: bool) -> None:
+    # Called after the version bumps: a tile render racing with us then sees the bump and drops its file
+    response_cache.invalidate("complaints")
+    if verified:
+        response_cache.invalidate("verified_issues")
+    tiles.invalidate_points(points)
+
+
+def scores_changed(db: Session) -> None:
+    """Scores were recomputed in bulk; they only feed the lists, not the tiles."""
+    data_versions.bump_version(db, "complaints")
+    response_cache.invalidate("complaints")
@@ -0,0 +1,23 @@
+# backend/data_versions.py
+from sqlalchemy import text
+from models import DATA_VERSION_SEQUENCES
+
+
+def _sequence_name(name: str) -> str:
+    if name not in DATA_VERSION_SEQUENCES:
+        raise ValueError(f"Unknown data version '{name}'")
+    return DATA_VERSION_SEQUENCES[name].name
+
+def current_version(conn, name: str) -> int:
+    """Returns the current version of a dataset without bumping it (0 before the first bump)."""
+    # last_value is already the start value before the first nextval; only is_called tells them apart
+    return conn.execute(
+        text(f"SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM {_sequence_name(name)}")
+    ).scalar_one()
+
+def bump_version(conn, name: str) -> int:
+    """
+    Marks a dataset as changed and returns the new version. Sequences are not
+    transactional, so call this after the change has been committed.
+    """
+    return conn.execute(text(f"SELECT nextval('{_sequence_name(name)}')")).scalar_one()
@@ -0,0 +1,155 @@
+# backend/dedupe_uploads.py
+"""
+Moves the images in UPLOAD_DIR into the content-addressed layout of
+uploads.py (UPLOAD_DIR/ab/abcd...ef.jpg), so each distinct image is stored
+once, rewrites complaints.image_url to the new URLs and rebuilds the
+upload_blobs reference counts from the complaints that use each image.
+
+The new names are created as hard links first and the old files are only
+removed after the URL rewrite has committed, so no complaint ever points at a
+missing file. Files that are not JPEG/PNG/GIF/WebP images are left alone.
+Run it from backend/ after `alembic upgrade head`; it is safe to run again.
+
+    python dedupe_uploads.py --dry-run     # report only
+    python dedupe_uploads.py
+    python dedupe_uploads.py --gc          # also delete images no complaint uses
+"""
+import argparse
+import os
+import shutil
+from dataclasses import dataclass
+
+from sqlalchemy import text
+
+from config import settings
+from database import SessionLocal
+import data_changes
+import uploads
+
+
+@dataclass
+class Blob:
+    relpath: str
+    size: int
+    content_type: str
+
+
+def _place(src, dst):
+    if os.path.exists(dst):
+        return
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+        os.chmod(dst, 0o644)
+
+
+def scan(upload_dir, dry_run):
+    """
+    Returns (blobs by hash, {old url: new url}, [legacy paths]) and, unless
+    `dry_run`, creates the content-addressed copy of every legacy image.
+    """
+    blobs, renamed, legacy = {}, {}, []
+    skipped = duplicates = saved = 0
+    for dirpath, dirnames, filenames in os.walk(upload_dir):
+        if dirpath == upload_dir and uploads.DERIVED_DIR in dirnames:
+            dirnames.remove(uploads.DERIVED_DIR)  # resized copies, see derivatives.py
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            relpath = os.path.relpath(path, upload_dir).replace(os.sep, "/")
+            if name.endswith(".part"):
+                continue
+            size = os.path.getsize(path)
+            sha256 = uploads.blob_sha256(relpath)
+            if sha256 is not None:
+                content_type = uploads.CONTENT_TYPES[os.path.splitext(name)[1]]
+                blobs.setdefault(sha256, Blob(relpath, size, content_type))
+                continue
+
+            sha256, kind = uploads.hash_file(path)
+            if kind is None:
+                skipped += 1
+                continue
+            content_type, extension = kind
+            target = uploads.blob_relpath(sha256, extension)
+            if sha256 in blobs or os.path.exists(os.path.join(upload_dir, target)):
+                duplicates += 1
+                saved += size
+            blobs.setdefault(sha256, Blob(target, size, content_type))
+            renamed[uploads.URL_PREFIX + relpath] = uploads.URL_PREFIX + target
+            legacy.append(path)
+            if not dry_run:
+                _place(path, os.path.join(upload_dir, target))
+
+    print(f"{len(blobs)} distinct images, {len(legacy)} to move, {duplicates} duplicates "
+          f"({saved / 2**20:.1f} MiB saved), {skipped} non-image files left alone")
+    return blobs, renamed, legacy
+
+
+def rewrite(db, blobs, renamed):
+    """Points complaints at the new URLs and sets every blob's refcount to its number of complaints."""
+    # Hold off complaint writes (and their uploads.store) so the counts can't go stale
+    db.execute(text("LOCK TABLE complaints, upload_blobs IN SHARE ROW EXCLUSIVE MODE"))
+    rewritten = 0
+    if renamed:
+        rewritten = db.execute(text("""
+            UPDATE complaints SET image_url = m.new_url
+            FROM unnest(CAST(:old AS text[]), CAST(:new AS text[])) AS m(old_url, new_url)
+            WHERE complaints.image_url = m.old_url
+        """), {"old": list(renamed), "new": list(renamed.values())}).rowcount
+
+    refcounts = dict.fromkeys(blobs, 0)
+    for image_url, count in db.execute(text(
+        "SELECT image_url, count(*) FROM complaints WHERE image_url IS NOT NULL GROUP BY image_url"
+    )):
+        sha256 = uploads.blob_sha256(image_url)
+        if sha256 in refcounts:
+            refcounts[sha256] += count
+    if blobs:
+        db.execute(text("""
+            INSERT INTO upload_blobs (sha256, path, size, content_type, refcount)
+            VALUES (:sha256, :path, :size, :content_type, :refcount)
+            ON CONFLICT (sha256) DO UPDATE SET refcount = EXCLUDED.refcount
+        """), [
+            {"sha256": sha256, "path": blob.relpath, "size": blob.size,
+             "content_type": blob.content_type, "refcount": refcounts[sha256]}
+            for sha256, blob in blobs.items()
+        ])
+    unreferenced = sum(1 for count in refcounts.values() if count == 0)
+    print(f"{rewritten} complaint image URLs rewritten, {unreferenced} images unreferenced")
+    return rewritten
+
+
+def run(dry_run, gc):
+    upload_dir = settings.UPLOAD_DIR
+    blobs, renamed, legacy = scan(upload_dir, dry_run)
+    if dry_run:
+        return
+
+    db = SessionLocal()
+    try:
+        rewritten = rewrite(db, blobs, renamed)
+        db.commit()
+        if rewritten:
+            data_changes.complaints_changed(db, points=[])
+
+        # Nothing references the old names any more
+        for path in legacy:
+            os.unlink(path)
+        print(f"removed {len(legacy)} old files")
+
+        if gc:
+            collected = uploads.collect_garbage(db)
+            db.commit()
+            print(f"deleted {collected} unreferenced images")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="only report what would change")
+    parser.add_argument("--gc", action="store_true", help="delete images no complaint references")
+    args = parser.parse_args()
+    run(args.dry_run, args.gc)
@@ -0,0 +1,172 @@
+# backend/derivatives.py
+"""
+Resized copies of uploaded images for the lists and map popups.
+
+Every image gets a "medium" (1024 px on the long edge) and a "thumb" (320 px)
+version, each as WebP and JPEG, under UPLOAD_DIR/derived/ab/<sha256>-<size>.<ext>.
+They are named after the original's hash, so they are immutable like it and
+an image shared by several complaints is resized once.
+
+The work runs in a small thread pool off the request path (Pillow releases
+the GIL while it decodes, resizes and encodes). At most DERIVATIVE_QUEUE_SIZE
+images wait at a time; beyond that new ones are dropped and left for
+backfill_thumbnails.py. Once an image's files are written, the complaints
+that use it get their thumbnail_url.
+"""
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from PIL import Image, ImageOps
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from config import settings
+import data_changes
+import uploads
+
+logger = logging.getLogger(__name__)
+
+# Largest first: each size is resized from the previous one, not from the original
+SIZES = (("medium", 1024), ("thumb", 320))
+FORMATS = (
+    (".webp", "WEBP", {"quality": 80, "method": 4}),
+    (".jpg", "JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+)
+THUMBNAIL = ("thumb", ".webp")
+
+
+def url(sha256: str, size: str = THUMBNAIL[0], extension: str = THUMBNAIL[1]) -> str:
+    return uploads.URL_PREFIX + uploads.derived_relpath(sha256, size, extension)
+
+
+def _path(sha256: str, size: str, extension: str) -> str:
+    return os.path.join(settings.UPLOAD_DIR, uploads.derived_relpath(sha256, size, extension))
+
+
+def exists(sha256: str) -> bool:
+    """True when every derivative of the image is on disk."""
+    return all(os.path.exists(_path(sha256, size, extension)) for size, _ in SIZES for extension, _, _ in FORMATS)
+
+
+def _save(image: Image.Image, path: str, image_format: str, options: dict) -> None:
+    # Temp file + rename, so a half-written derivative is never served
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            image.save(out, image_format, **options)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def generate(source_path: str, sha256: str) -> None:
+    """Writes every derivative of the image at `source_path`."""
+    os.makedirs(os.path.dirname(_path(sha256, *THUMBNAIL)), exist_ok=True)
+    with Image.open(source_path) as original:
+        # JPEGs can decode at 1/2, 1/4 or 1/8 scale directly, far cheaper than a full decode
+        original.draft("RGB", (SIZES[0][1], SIZES[0][1]))
+        image = ImageOps.exif_transpose(original).convert("RGB")
+    for size, edge in SIZES:
+        image.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        for extension, image_format, options in FORMATS:
+            _save(image, _path(sha256, size, extension), image_format, options)
+
+
+def record(db: Session, image_url: str, sha256: str) -> int:
+    """Sets thumbnail_url on the complaints showing `image_url`; returns how many changed. The caller commits."""
+    return db.execute(text("""
+        UPDATE complaints SET thumbnail_url = :thumbnail_url
+        WHERE image_url = :image_url AND thumbnail_url IS DISTINCT FROM :thumbnail_url
+    """), {"image_url": image_url, "thumbnail_url": url(sha256)}).rowcount
+
+
+class DerivativePool:
+    """Bounded thread pool that makes derivatives and records them."""
+
+    def __init__(self, session_factory, workers: int, queue_size: int):
+        self._session_factory = session_factory
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="derivatives")
+        # Queued + running jobs; submit() drops work instead of letting the backlog grow
+        self._slots = threading.BoundedSemaphore(queue_size)
+        # Bumped from the workers and the event loop alike
+        self._counts_lock = threading.Lock()
+        self.done = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def _count(self, outcome: str) -> None:
+        with self._counts_lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def submit(self, image_url: str, source_path: str, sha256: str) -> bool:
+        if not self._slots.acquire(blocking=False):
+            self._count("dropped")
+            return False
+        try:
+            self._executor.submit(self._run, image_url, source_path, sha256)
+        except RuntimeError:  # shut down
+            self._slots.release()
+            return False
+        return True
+
+    def _run(self, image_url: str, source_path: str, sha256: str) -> None:
+        try:
+            if not exists(sha256):
+                generate(source_path, sha256)
+            db = self._session_factory()
+            try:
+                changed = record(db, image_url, sha256)
+                db.commit()
+                if changed:
+                    data_changes.complaints_changed(db, points=[])
+            finally:
+                db.close()
+            self._count("done")
+        except Exception:
+            self._count("failed")
+            logger.exception("Could not make derivatives of %s", image_url)
+        finally:
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._counts_lock:
+            return {"done": self.done, "failed": self.failed, "dropped": self.dropped}
+
+
+_pool: Optional[DerivativePool] = None
+
+
+def start(session_factory, workers: int, queue_size: int) -> None:
+    global _pool
+    _pool = DerivativePool(session_factory, workers, queue_size)
+
+
+def stop() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+    _pool = None
+
+
+def submit(image_url: str, sha256: str) -> bool:
+    """Queues the derivatives of a stored content-addressed image; False when not queued."""
+    if _pool is None:
+        return False
+    source_path = os.path.join(settings.UPLOAD_DIR, image_url[len(uploads.URL_PREFIX):])
+    return _pool.submit(image_url, source_path, sha256)
+
+
+def stats() -> dict:
+    if _pool is None:
+        return {"enabled": False}
+    return {"enabled": True, **_pool.stats()}
@@ -0,0 +1,54 @@
+# backend/etags.py
+"""
+Conditional GET for list endpoints.
+
+The ETag is built from the data versions of the tables a response reads
+(see data_versions.py) plus the request's query string, so checking it costs
+one sequence read and answering If-None-Match needs no rows at all. Versions
+are read before the data: a write that commits in between can only make the
+tag older than the body, which costs the client one extra refetch, never a
+stale 304.
+"""
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+
+import data_versions
+
+ETAG_HEADER = "ETag"
+
+
+def request_digest(request: Request, variant: Optional[str] = None) -> str:
+    """Short hash identifying the representation a request asks for (path + query + variant)."""
+    # Same query in a different order is the same representation
+    query = "&".join(sorted(request.url.query.split("&"))) if request.url.query else ""
+    return hashlib.sha1(f"{request.url.path}?{query}|{variant or ''}".encode()).hexdigest()[:16]
+
+
+def compute(db, request: Request, *datasets: str, variant: Optional[str] = None) -> str:
+    """Strong ETag for `request` over the given datasets' current versions."""
+    versions = ".".join(str(data_versions.current_version(db, name)) for name in datasets)
+    return f'"{versions}-{request_digest(request, variant)}"'
+
+
+def is_fresh(request: Request, etag: str) -> bool:
+    """True when the client's If-None-Match already covers `etag`."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison: W/"x" matches "x"
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={ETAG_HEADER: etag, "Cache-Control": "no-cache"})
+
+
+def set_etag(response: Response, etag: str) -> None:
+    # no-cache: keep a copy, but revalidate it on every use
+    response.headers[ETAG_HEADER] = etag
+    response.headers["Cache-Control"] = "no-cache"
@@ -64,12 +64,17 @@ def run_temp_updates():
                         vote_type='not_resolved'
                     )
                     db.add(new_vote)
+                    db.query(models.Complaint).filter(models.Complaint.id == complaint_id).update(
+                        {models.Complaint.not_resolved_votes: models.Complaint.not_resolved_votes + 1},
+                        synchronize_session=False,
+                    )
                     print(f"   -> Added 'not_resolved' vote from User #{user_id} to Complaint #{complaint_id}")
         
         db.commit()
 
         # --- 4. Recalculate scores for complaints that received votes ---
         print("\nRecalculating scores for complaints with new votes...")
+        db.expire_all()
         complaints_with_new_votes = db.query(models.Complaint).filter(models.Complaint.id.in_(pending_verification_ids)).all()
         
         for complaint in complaints_with_new_votes:
@@ -1,50 +1,184 @@
 # backend/image_classifier.py
-import tensorflow as tf
-from tensorflow.keras.preprocessing import image
-import numpy as np
-import json
+"""
+Issue classifier for /AIhelp/assist.
+
+The model runs on the CLASSIFIER_BACKEND of classifier_backends.py (keras
+reference or quantized TFLite). Loading it costs seconds and hundreds of MB,
+so nothing is loaded at import: main.py starts a background warm-up
+(CLASSIFIER_WARMUP), and otherwise the first prediction loads the model. status() reports where
+loading is for /health. With CLASSIFIER_ENABLED off the model is never loaded
+and predictions return None, as they do when it fails to load.
+
+Requests go through classify(): the image is decoded in the threadpool and
+the model runs on micro-batches of concurrent requests on one dedicated
+thread (see inference_batcher.py), never on the event loop.
+"""
 import io
-from typing import Optional, Tuple
-# --- Load Model and Mappings on Startup ---
-try:
-    model = tf.keras.models.load_model("ml_model/issue_classifier.h5")
+import json
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+from PIL import Image, ImageOps
+from starlette.concurrency import run_in_threadpool
+
+from config import settings
+import classifier_backends
+from inference_batcher import InferenceBatcher
+
+department_mapping = {
+    "pothole": "Roads",
+    "street light": "Electricity",
+    "drainage": "Water",
+    "bridges": "Roads", # Or a specific bridges department
+    "buildings": "govt buildings",
+    "deck": "Roads",
+    "pavement": "Roads",
+    "wall": "govt buildings",
+}
+
+INPUT_SIZE = (224, 224)  # (width, height) the classifier was trained on
+
+# not_loaded -> loading -> ready | failed; disabled when CLASSIFIER_ENABLED is off
+model = None
+labels = {}
+_state = {
+    "status": "not_loaded" if settings.CLASSIFIER_ENABLED else "disabled",
+    "backend": settings.CLASSIFIER_BACKEND,
+    "error": None,
+    "load_seconds": None,
+}
+_load_lock = threading.Lock()
+_batcher: Optional[InferenceBatcher] = None
 
-    with open("ml_model/class_indices.json", "r") as f:
+
+def load_labels() -> dict:
+    """Class index -> label, from the class_indices.json written at training time."""
+    with open(settings.CLASSIFIER_CLASS_INDICES_PATH, "r") as f:
         class_indices = json.load(f)
+    return {v: k for k, v in class_indices.items()}
+
+
+def load():
+    """Loads the model and labels once; concurrent callers wait for the first. Returns the model or None."""
+    global model, labels
+    if _state["status"] in ("ready", "failed", "disabled"):
+        return model
+    with _load_lock:
+        if _state["status"] != "not_loaded":
+            return model
+        _state["status"] = "loading"
+        start = time.perf_counter()
+        try:
+            loaded = classifier_backends.load_backend(settings.CLASSIFIER_BACKEND)
+            labels = load_labels()
+            model = loaded
+            _state["status"] = "ready"
+            print(f"✅ Classifier ({loaded.name}) and class indices loaded successfully.")
+        except Exception as e:
+            _state.update(status="failed", error=str(e))
+            print(f"🔥 Error loading classifier ({settings.CLASSIFIER_BACKEND}): {e}")
+        _state["load_seconds"] = round(time.perf_counter() - start, 2)
+    return model
+
+
+def start_warmup() -> None:
+    """Loads the model in a background thread so the first /AIhelp/assist call does not pay for it."""
+    if _state["status"] == "not_loaded":
+        threading.Thread(target=load, name="classifier-warmup", daemon=True).start()
 
-    labels = {v: k for k, v in class_indices.items()}
 
-    department_mapping = {
-        "pothole": "Roads",
-        "street light": "Electricity",
-        "drainage": "Water",
-        "bridges": "Roads", # Or a specific bridges department
-        "buildings": "govt buildings",
-        "deck": "Roads",
-        "pavement": "Roads",
-        "wall": "govt buildings",
-    }
-    print("✅ TensorFlow model and class indices loaded successfully.")
-except Exception as e:
-    model = None
-    print(f"🔥 Error loading TensorFlow model: {e}")
+def status() -> dict:
+    result = {**_state, "ready": _state["status"] == "ready"}
+    if _batcher is not None:
+        result["batching"] = _batcher.stats()
+    return result
+
+
+def decode(image_bytes: bytes) -> np.ndarray:
+    """
+    Decodes an upload into (224, 224, 3) uint8 RGB pixels, upright.
+
+    JPEGs are decoded in draft mode: libjpeg scales the DCT by 1/2, 1/4 or
+    1/8 while decoding, to the smallest size still at least 224 px, so a
+    12 MP photo costs about as much as a 0.2 MP one. The EXIF orientation is
+    applied (phones store portrait shots sideways); the rest matches keras'
+    load_img(target_size=(224, 224)): RGB, nearest-neighbour resize.
+    """
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        img.draft("RGB", INPUT_SIZE)
+        ImageOps.exif_transpose(img, in_place=True)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        img = img.resize(INPUT_SIZE, Image.NEAREST)
+    return np.asarray(img)
+
+
+def to_input(pixels: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """Scales decoded pixels to the model's [0, 1] float32 input, straight into `out` (e.g. a batch slot)."""
+    return np.divide(pixels, np.float32(255), out=out)
+
+
+def preprocess(image_bytes: bytes) -> np.ndarray:
+    """The model's (224, 224, 3) float32 input for one upload."""
+    pixels = decode(image_bytes)
+    return to_input(pixels, np.empty(pixels.shape, dtype=np.float32))
+
+
+def departments(preds: np.ndarray, class_labels: Optional[dict] = None) -> List[str]:
+    """Mapped department of each row of class probabilities."""
+    class_labels = labels if class_labels is None else class_labels
+    return [department_mapping.get(class_labels[i], "unassigned") for i in np.argmax(preds, axis=1)]
+
+
+def predict_batch(batch: np.ndarray) -> List[Optional[str]]:
+    """Mapped department for each image of a (n, 224, 224, 3) batch. Blocks while the model loads."""
+    if not load():
+        return [None] * len(batch)
+    return departments(model.predict(batch))
 
 
 def predict_issue_from_image_tf(image_bytes: bytes) -> Optional[str]:
     """
     Takes image bytes, uses the TensorFlow model to predict the issue,
-    and returns ONLY the mapped department.
+    and returns ONLY the mapped department. Unbatched and blocking; request
+    handlers use classify().
     """
-    if not model:
+    if not load():
+        return None
+    try:
+        return predict_batch(preprocess(image_bytes)[np.newaxis])[0]
+    except Exception as e:
+        print(f"Error during TF prediction: {e}")
+        return None
+
+
+def start_batcher(max_batch_size: int, max_wait_ms: float) -> None:
+    global _batcher
+    if _state["status"] != "disabled" and _batcher is None:
+        _batcher = InferenceBatcher(
+            predict_batch, max_batch_size, max_wait_ms, INPUT_SIZE[::-1] + (3,), fill=to_input, name="classifier-batcher",
+        )
+        _batcher.start()
+
+
+def stop_batcher() -> None:
+    global _batcher
+    if _batcher is not None:
+        _batcher.stop()
+    _batcher = None
+
+
+async def classify(image_bytes: bytes) -> Optional[str]:
+    """predict_issue_from_image_tf for async handlers: batched with concurrent requests when the batcher runs."""
+    if _state["status"] in ("disabled", "failed"):
         return None
+    if _batcher is None:
+        return await run_in_threadpool(predict_issue_from_image_tf, image_bytes)
     try:
-        img = image.load_img(io.BytesIO(image_bytes), target_size=(224, 224))
-        img_array = image.img_to_array(img) / 255.0
-        img_array = np.expand_dims(img_array, axis=0)
-        preds = model.predict(img_array, verbose=0)
-        predicted_class = labels[np.argmax(preds)]
-        department = department_mapping.get(predicted_class, "unassigned")
-        return department
+        # Decoded in the threadpool; the batcher scales the pixels into its batch buffer
+        return await _batcher.submit(await run_in_threadpool(decode, image_bytes))
     except Exception as e:
         print(f"Error during TF prediction: {e}")
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,130 @@
+# backend/inference_batcher.py
+"""
+Micro-batching for model inference.
+
+Async callers submit one input each and await a future. A single dedicated
+thread takes the first waiting input, keeps collecting until it has
+`max_batch_size` of them or `max_wait_ms` has passed, writes them into a batch
+buffer allocated once up front (`fill`, e.g. converting uint8 pixels to the
+model's float input on the way), runs the batch function once on it and
+resolves every caller's future with its own result. Under load the model runs
+on full batches (vectorised, one call overhead per batch); a lone request
+waits at most `max_wait_ms` extra.
+"""
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class InferenceBatcher:
+    def __init__(
+        self,
+        predict_batch: Callable[[np.ndarray], Sequence[Any]],
+        max_batch_size: int,
+        max_wait_ms: float,
+        input_shape: Tuple[int, ...],
+        fill: Optional[Callable[[Any, np.ndarray], Any]] = None,
+        dtype=np.float32,
+        name: str = "inference-batcher",
+    ):
+        self._predict_batch = predict_batch
+        self._fill = fill or _copy
+        # Reused for every batch: only the batcher thread touches it, and
+        # predict_batch is done with it before the next batch is collected
+        self._buffer = np.empty((max_batch_size,) + tuple(input_shape), dtype=dtype)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.batches = 0
+        self.items = 0
+        self._batch_sizes = deque(maxlen=500)
+        self._predict_seconds = deque(maxlen=500)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Finishes the batches already queued, then stops the thread."""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    async def submit(self, item: np.ndarray) -> Any:
+        """Queues one input (anything `fill` accepts) and returns its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((item, future, loop))
+        return await future
+
+    def _collect(self, first) -> List[tuple]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                self._queue.put(_STOP)  # seen again by _run once this batch is done
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = self._collect(first)
+            start = time.perf_counter()
+            try:
+                for slot, (item, _, _) in zip(self._buffer, batch):
+                    self._fill(item, slot)
+                results = self._predict_batch(self._buffer[:len(batch)])
+                outcomes = [(future.set_result, result) for (_, future, _), result in zip(batch, results)]
+            except Exception as exc:
+                logger.exception("Batch of %d failed", len(batch))
+                outcomes = [(future.set_exception, exc) for _, future, _ in batch]
+            self._record(len(batch), time.perf_counter() - start)
+            for (_, future, loop), (resolve, value) in zip(batch, outcomes):
+                loop.call_soon_threadsafe(_resolve, future, resolve, value)
+
+    def _record(self, size: int, seconds: float) -> None:
+        self.batches += 1
+        self.items += size
+        self._batch_sizes.append(size)
+        self._predict_seconds.append(seconds)
+
+    def stats(self) -> dict:
+        sizes = list(self._batch_sizes)
+        seconds = list(self._predict_seconds)
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "queued": self._queue.qsize(),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "recent_mean_batch_size": round(sum(sizes) / len(sizes), 2) if sizes else None,
+            "recent_mean_predict_ms": round(sum(seconds) / len(seconds) * 1000, 2) if seconds else None,
+        }
+
+
+def _copy(item: np.ndarray, out: np.ndarray) -> None:
+    out[...] = item
+
+
+def _resolve(future: asyncio.Future, resolve: Callable, value: Any) -> None:
+    # The caller may have gone away (client disconnect cancels the handler)
+    if not future.done():
+        resolve(value)
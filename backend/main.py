@@ -1,17 +1,29 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
 import traceback
 
-from database import Base, engine
+from database import Base, engine, SessionLocal, dispose_async_engine
+from config import settings
 import models
-from routers import complaints, admin, user, votes, autofillAi, resolved
+import poi_index
+import ranking_service
+import pagination
+import etags
+import response_cache
+import search_service
+import uploads
+import derivatives
+import image_classifier
+from routers import complaints, admin, user, votes, autofillAi, resolved, tiles
 from dotenv import load_dotenv
 
 
 app = FastAPI()
 
+# 🔹 Upload size cap, enforced before the multipart body is parsed (inside CORS so a 413 carries its headers)
+app.add_middleware(uploads.UploadSizeLimit, paths=("/complaints/register",))
+
 # 🔹 CORS
 origins = ["http://localhost:3000"]
 app.add_middleware(
@@ -20,14 +32,57 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[pagination.NEXT_CURSOR_HEADER, etags.ETAG_HEADER, search_service.MODE_HEADER],
 )
 
-# 🔹 Static files (for images)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# 🔹 Static files (for images; content-addressed ones are served as immutable)
+app.mount("/uploads", uploads.UploadFiles(directory=settings.UPLOAD_DIR), name="uploads")
 
 # 🔹 Auto-create tables (dev only)
 Base.metadata.create_all(bind=engine)
 
+# 🔹 Ranking weights from config (re-read automatically when the file changes)
+if settings.RANKING_WEIGHTS_FILE:
+    ranking_service.load_weights(settings.RANKING_WEIGHTS_FILE)
+
+# 🔹 Response cache for the list endpoints
+response_cache.configure(
+    settings.RESPONSE_CACHE_BACKEND, settings.RESPONSE_CACHE_TTL_SECONDS,
+    settings.RESPONSE_CACHE_MAX_ENTRIES, settings.REDIS_URL,
+)
+
+# 🔹 Optional in-memory POI index for location scoring
+@app.on_event("startup")
+def load_poi_index():
+    if settings.POI_INDEX_ENABLED:
+        poi_index.start(SessionLocal, settings.POI_INDEX_REFRESH_SECONDS)
+
+@app.on_event("shutdown")
+def stop_poi_index():
+    poi_index.stop()
+
+@app.on_event("startup")
+def warm_up_classifier():
+    if settings.CLASSIFIER_WARMUP:
+        image_classifier.start_warmup()
+    image_classifier.start_batcher(settings.CLASSIFIER_BATCH_SIZE, settings.CLASSIFIER_BATCH_WAIT_MS)
+
+@app.on_event("shutdown")
+def stop_classifier():
+    image_classifier.stop_batcher()
+
+@app.on_event("startup")
+def start_derivatives():
+    derivatives.start(SessionLocal, settings.DERIVATIVE_WORKERS, settings.DERIVATIVE_QUEUE_SIZE)
+
+@app.on_event("shutdown")
+def stop_derivatives():
+    derivatives.stop()
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    await dispose_async_engine()
+
 # ✅ GLOBAL ERROR HANDLER
 @app.exception_handler(Exception)
 async def all_exception_handler(request, exc: Exception):
@@ -42,6 +97,19 @@ async def all_exception_handler(request, exc: Exception):
 async def root():
     return {"message": "Civic Guardian API running"}
 
+@app.get("/health")
+async def health():
+    """Liveness, plus how far the issue classifier has loaded."""
+    return {"status": "ok", "classifier": image_classifier.status()}
+
+@app.get("/health/ready")
+async def health_ready():
+    """503 while the classifier warm-up is still running, for load balancer readiness checks."""
+    classifier = image_classifier.status()
+    # A failed load is not waited on: /AIhelp/assist then works without the image hint
+    warming_up = classifier["status"] == "loading" or (classifier["status"] == "not_loaded" and settings.CLASSIFIER_WARMUP)
+    return JSONResponse({"ready": not warming_up, "classifier": classifier}, status_code=503 if warming_up else 200)
+
 # 🔹 Routers
 app.include_router(complaints.router)
 app.include_router(admin.router)
@@ -49,3 +117,4 @@ app.include_router(user.router)
 app.include_router(votes.router)
 app.include_router(autofillAi.router)
 app.include_router(resolved.router)
+app.include_router(tiles.router)
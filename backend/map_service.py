@@ -0,0 +1,104 @@
+# backend/map_service.py
+"""
+Viewport queries for the complaint map.
+
+Both modes filter with `location && envelope`, which is answered by the GiST
+index on complaints.location, so the cost follows what is on screen rather
+than the size of the table. Zoomed in, raw points are returned; zoomed out,
+points are grouped into a square grid whose cell size tracks the zoom level,
+and each cell comes back as one cluster.
+"""
+from typing import List, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import codes
+
+# At this zoom and above the map gets individual points instead of clusters
+CLUSTER_MAX_ZOOM = 15
+# Cluster grid cell edge, in screen pixels (a web-mercator tile is 256px wide)
+CLUSTER_CELL_PX = 64
+# Safety cap on raw points per response
+MAX_POINTS = 5000
+
+# Priority labels by code, least to most urgent
+PRIORITY_ORDER = [codes.PRIORITY.labels[code] for code in sorted(codes.PRIORITY.labels)]
+
+BBox = Tuple[float, float, float, float]
+
+
+def parse_bbox(bbox: str) -> BBox:
+    """Parses "min_lon,min_lat,max_lon,max_lat" (the Leaflet toBBoxString() order)."""
+    try:
+        west, south, east, north = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be min_lon,min_lat,max_lon,max_lat")
+    if not (-180 <= west < east <= 180 and -90 <= south < north <= 90):
+        raise HTTPException(status_code=400, detail="bbox is out of range or inverted")
+    return west, south, east, north
+
+
+def cell_size_deg(zoom: int) -> float:
+    """Grid cell edge in degrees of longitude at `zoom` (one tile spans 360 / 2**zoom)."""
+    return 360.0 / (2 ** zoom) * CLUSTER_CELL_PX / 256
+
+
+def _bbox_params(bbox: BBox) -> dict:
+    west, south, east, north = bbox
+    return {"west": west, "south": south, "east": east, "north": north}
+
+
+_ENVELOPE = "ST_MakeEnvelope(:west, :south, :east, :north, 4326)::geography"
+
+
+def _points(db: Session, bbox: BBox) -> List[dict]:
+    rows = db.execute(text(f"""
+        SELECT id, title, department, status, priority, process,
+               ST_Y(location::geometry) AS lat, ST_X(location::geometry) AS lon
+        FROM complaints
+        WHERE location && {_ENVELOPE}
+        LIMIT :limit
+    """), {**_bbox_params(bbox), "limit": MAX_POINTS}).all()
+    return [dict(row._mapping) for row in rows]
+
+
+def _clusters(db: Session, bbox: BBox, zoom: int) -> List[dict]:
+    rows = db.execute(text(f"""
+        WITH pts AS (
+            SELECT ST_X(location::geometry) AS lon, ST_Y(location::geometry) AS lat,
+                   COALESCE(department, 'Unknown') AS department,
+                   COALESCE(priority_code, 0) AS priority_rank
+            FROM complaints
+            WHERE location && {_ENVELOPE}
+        ), per_department AS (
+            SELECT floor(lon / :cell) AS cx, floor(lat / :cell) AS cy, department,
+                   COUNT(*) AS n, SUM(lon) AS sum_lon, SUM(lat) AS sum_lat,
+                   MAX(priority_rank) AS priority_rank
+            FROM pts
+            GROUP BY 1, 2, 3
+        )
+        SELECT SUM(n)::integer AS count,
+               SUM(sum_lat) / SUM(n) AS lat, SUM(sum_lon) / SUM(n) AS lon,
+               jsonb_object_agg(department, n) AS departments,
+               MAX(priority_rank) AS priority_rank
+        FROM per_department
+        GROUP BY cx, cy
+    """), {**_bbox_params(bbox), "cell": cell_size_deg(zoom)}).all()
+    return [
+        {
+            "count": row.count, "lat": row.lat, "lon": row.lon,
+            "departments": row.departments,
+            "max_priority": PRIORITY_ORDER[row.priority_rank],
+        }
+        for row in rows
+    ]
+
+
+def viewport(db: Session, bbox: BBox, zoom: int) -> dict:
+    """Points or clusters (depending on zoom) for the complaints inside bbox."""
+    if zoom >= CLUSTER_MAX_ZOOM:
+        points = _points(db, bbox)
+        return {"mode": "points", "zoom": zoom, "truncated": len(points) == MAX_POINTS, "points": points}
+    return {"mode": "clusters", "zoom": zoom, "cell_deg": cell_size_deg(zoom), "clusters": _clusters(db, bbox, zoom)}
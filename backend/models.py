@@ -1,8 +1,10 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, TIMESTAMP, func, Boolean, DateTime, UniqueConstraint, Float
-from sqlalchemy.dialects.postgresql import TEXT
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, TIMESTAMP, func, Boolean, DateTime, UniqueConstraint, Float, Index, Sequence, SmallInteger, Computed
+from sqlalchemy import DDL, event
+from sqlalchemy.dialects.postgresql import TEXT, TSVECTOR
 from sqlalchemy.orm import relationship
 from geoalchemy2 import Geography
 from database import Base
+import codes
 
 class Complaint(Base):
     __tablename__ = "complaints"
@@ -15,14 +17,48 @@ class Complaint(Base):
     status = Column(String, default="Unresolved")  # unresolved and resolved
     priority = Column(String, default="none")      # none, low, medium, high
     image_url = Column(String, nullable=True)
+    thumbnail_url = Column(String, nullable=True)  # set by derivatives.py once the resized copies exist
     location = Column(Geography(geometry_type="POINT", srid=4326))
     locationName = Column("locationName", String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     process= Column(String, nullable=True) # unassigned, assigned, in_progress, pending_verification
     score = Column(Float, nullable=False, default=0, server_default='0') # <-- ADD THIS LINE
+    location_score = Column(Integer, nullable=True)     # cached POI proximity weight, set once at creation
+    location_poi_type = Column(String, nullable=True)   # POI type that produced location_score
+    # Denormalized vote counters, incremented in the same transaction as each vote insert
+    resolved_votes = Column(Integer, nullable=False, default=0, server_default='0')
+    not_resolved_votes = Column(Integer, nullable=False, default=0, server_default='0')
+    # Canonical codes of the label columns above (see codes.py), maintained by Postgres
+    status_code = Column(SmallInteger, Computed(codes.STATUS.code_sql(), persisted=True))
+    process_code = Column(SmallInteger, Computed(codes.PROCESS.code_sql(), persisted=True))
+    priority_code = Column(SmallInteger, Computed(codes.PRIORITY.code_sql(), persisted=True))
+    department_code = Column(SmallInteger, Computed(codes.DEPARTMENT.code_sql(), persisted=True))
+    # Full-text document for /complaints/search: title weighted above description
+    search_vector = Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('english'::regconfig, COALESCE(title, '')), 'A') || "
+        "setweight(to_tsvector('english'::regconfig, COALESCE(description, '')), 'B')",
+        persisted=True,
+    ))
 
     user = relationship("User", back_populates="complaints")
     votes = relationship("Vote", back_populates="complaint")
+
+    __table_args__ = (
+        # Serves /admin/complaints/ranked as a single ordered scan of the open backlog
+        Index("ix_complaints_unresolved_score_id", score.desc(), id,
+              postgresql_where=status_code == codes.STATUS_UNRESOLVED),
+        # Keyset pagination for the newest-first lists (/complaints/all, /admin/complaints, /votes/pending)
+        Index("ix_complaints_created_at_id", created_at, id),
+        Index("ix_complaints_process_code_created_at_id", process_code, created_at, id),
+        # /admin/filter
+        Index("ix_complaints_status_department_created_at_id", status_code, department_code, created_at, id),
+        Index("ix_complaints_unresolved_priority_created_at_id", priority_code, created_at, id,
+              postgresql_where=status_code == codes.STATUS_UNRESOLVED),
+        # /complaints/search: full-text matches, and trigram fallback for misspelt titles
+        Index("ix_complaints_search_vector", search_vector, postgresql_using="gin"),
+        Index("ix_complaints_title_trgm", title, postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+    )
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
@@ -71,3 +107,38 @@ class VerifiedIssue(Base):
     location = Column(Geography(geometry_type="POINT", srid=4326))
     locationName = Column(String(200))
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Keyset pagination for /resolved/all_resolved
+        Index("ix_verified_issues_created_at_id", created_at, id),
+    )
+
+
+class UploadBlob(Base):
+    """A stored image, named by its SHA-256, and how many complaints use it (see uploads.py)."""
+    __tablename__ = "upload_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    path = Column(String, nullable=False)       # relative to UPLOAD_DIR
+    size = Column(Integer, nullable=False)
+    content_type = Column(String(50), nullable=False)
+    refcount = Column(Integer, nullable=False, default=0, server_default='0')
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # uploads.collect_garbage
+        Index("ix_upload_blobs_unreferenced", sha256, postgresql_where=refcount == 0),
+    )
+
+
+# --- Data version markers ---
+# Cheap, lock-free change counters (one Postgres sequence per dataset).
+# Writers bump them with nextval(); readers compare last_value to detect changes.
+DATA_VERSION_SEQUENCES = {
+    "pois": Sequence("pois_data_version", metadata=Base.metadata),
+    "complaints": Sequence("complaints_data_version", metadata=Base.metadata),
+    "verified_issues": Sequence("verified_issues_data_version", metadata=Base.metadata),
+}
+
+# The trigram index above needs pg_trgm; migrations create it too, this covers create_all
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
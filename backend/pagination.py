@@ -0,0 +1,99 @@
+# backend/pagination.py
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_, tuple_, DateTime
+
+import models
+
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Sort keys: (column, descending). The last key must be unique (the primary key).
+Keyset = Sequence[Tuple[Any, bool]]
+
+
+# Keysets used by the list endpoints, each backed by a matching composite index
+COMPLAINTS_NEWEST_FIRST = ((models.Complaint.created_at, True), (models.Complaint.id, True))
+COMPLAINTS_RANKED = ((models.Complaint.score, True), (models.Complaint.id, False))
+VERIFIED_NEWEST_FIRST = ((models.VerifiedIssue.created_at, True), (models.VerifiedIssue.id, True))
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, keys: Keyset) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("cursor does not match this endpoint")
+        return [
+            datetime.fromisoformat(v) if v is not None and isinstance(column.type, DateTime) else v
+            for (column, _), v in zip(keys, values)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def _after(keys: Keyset, values: Sequence[Any]):
+    """
+    Lexicographic 'comes after the cursor' condition, honouring each key's
+    direction, written so Postgres can start the index scan at the cursor.
+    """
+    directions = {descending for _, descending in keys}
+    if len(directions) == 1 and None not in values:
+        # One direction: a row comparison, which is an index range bound on its own
+        columns, bound = tuple_(*(column for column, _ in keys)), tuple_(*values)
+        return columns < bound if directions.pop() else columns > bound
+
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        prefix = [keys[j][0] == values[j] for j in range(i)]
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*prefix, step))
+    condition = or_(*clauses)
+    # Mixed directions: the OR alone is only a filter; the redundant bound on
+    # the leading key is what lets the scan skip the rows before the cursor
+    leading, descending = keys[0]
+    if values[0] is not None:
+        condition = and_(leading <= values[0] if descending else leading >= values[0], condition)
+    return condition
+
+def order_clauses(keys: Keyset):
+    return [column.desc() if descending else column.asc() for column, descending in keys]
+
+
+def ordered(stmt, keys: Keyset, cursor: Optional[str] = None):
+    """Orders `stmt` by `keys`, starting after `cursor` when one is given."""
+    if cursor:
+        stmt = stmt.where(_after(keys, decode_cursor(cursor, keys)))
+    return stmt.order_by(*order_clauses(keys))
+
+
+def paginate(db, stmt, keys: Keyset, limit: Optional[int], cursor: Optional[str]):
+    """
+    Keyset pagination for a Core SELECT. Orders by `keys`, skips everything up to
+    and including the cursor row, and returns (rows, next_cursor). Because the
+    position is a WHERE on indexed columns rather than an OFFSET, page N costs
+    the same as page 1. With no limit the whole (ordered) result is returned.
+    """
+    stmt = ordered(stmt, keys, cursor)
+    # The sort keys ride along under private labels so the next cursor can be built
+    stmt = stmt.add_columns(*(column.label(f"_cursor_{i}") for i, (column, _) in enumerate(keys)))
+    if limit is None:
+        return db.execute(stmt).all(), None
+
+    rows = db.execute(stmt.limit(limit + 1)).all()
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]._mapping
+    return rows[:limit], encode_cursor([last[f"_cursor_{i}"] for i in range(len(keys))])
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
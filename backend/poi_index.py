@@ -0,0 +1,182 @@
+# backend/poi_index.py
+"""
+Optional in-memory spatial index of the `pois` table.
+
+POIs are bucketed into a uniform lat/lon grid, grouped by type, so that
+ranking_service can answer "max LOCATION_SCORES weight within LOCATION_RADIUS_M"
+without a database round trip. Enabled with POI_INDEX_ENABLED; a background thread
+reloads it whenever import_pois.py bumps the `pois` data version.
+"""
+import logging
+import math
+import sys
+import threading
+from array import array
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+import data_versions
+import ranking_service
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6371008.8  # mean Earth radius (IUGG)
+CELL_SIZE_DEG = 0.01        # ~1.1 km of latitude per cell
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in metres between two WGS84 points."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _cell(lat: float, lon: float) -> Tuple[int, int]:
+    return int(math.floor(lat / CELL_SIZE_DEG)), int(math.floor(lon / CELL_SIZE_DEG))
+
+
+class POIIndex:
+    """Uniform grid hash of POI points, one grid per POI type."""
+
+    def __init__(self, version: int):
+        self.version = version
+        self.point_count = 0
+        # type -> cell -> flat array of (lat, lon) pairs
+        self._grids: Dict[str, Dict[Tuple[int, int], array]] = defaultdict(dict)
+        # Types bucketed by weight, heaviest first, so lookups can stop early
+        self._weight_groups: List[Tuple[int, List[str]]] = []
+
+    def add(self, poi_type: str, lat: float, lon: float) -> None:
+        cells = self._grids[poi_type]
+        key = _cell(lat, lon)
+        if key not in cells:
+            cells[key] = array("d")
+        cells[key].extend((lat, lon))
+        self.point_count += 1
+
+    def finalize(self) -> "POIIndex":
+        groups = defaultdict(list)
+        for poi_type in self._grids:
+            groups[ranking_service.LOCATION_SCORES[poi_type]].append(poi_type)
+        self._weight_groups = sorted(groups.items(), reverse=True)
+        return self
+
+    def _nearest_distance(self, poi_type: str, lat: float, lon: float, radius_m: float) -> Optional[float]:
+        cells = self._grids[poi_type]
+        lat_span = math.ceil(math.degrees(radius_m / EARTH_RADIUS_M) / CELL_SIZE_DEG)
+        cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+        lon_span = math.ceil(math.degrees(radius_m / (EARTH_RADIUS_M * cos_lat)) / CELL_SIZE_DEG)
+        row, col = _cell(lat, lon)
+
+        nearest = None
+        for i in range(row - lat_span, row + lat_span + 1):
+            for j in range(col - lon_span, col + lon_span + 1):
+                points = cells.get((i, j))
+                if points is None:
+                    continue
+                for k in range(0, len(points), 2):
+                    distance = haversine_m(lat, lon, points[k], points[k + 1])
+                    if distance <= radius_m and (nearest is None or distance < nearest):
+                        nearest = distance
+        return nearest
+
+    def location_score(self, lat: float, lon: float, radius_m: Optional[float] = None) -> Tuple[int, Optional[str]]:
+        """
+        Same answer as ranking_service.lookup_location_score: the highest weight
+        within radius_m and the type that produced it (ties go to the closest POI).
+        """
+        if radius_m is None:
+            radius_m = ranking_service.LOCATION_RADIUS_M
+        for weight, poi_types in self._weight_groups:
+            best = None
+            for poi_type in poi_types:
+                distance = self._nearest_distance(poi_type, lat, lon, radius_m)
+                if distance is not None and (best is None or distance < best[0]):
+                    best = (distance, poi_type)
+            if best:
+                return weight, best[1]
+        return 0, None
+
+    def memory_bytes(self) -> int:
+        """Approximate footprint of the index structures."""
+        total = sys.getsizeof(self._grids)
+        for cells in self._grids.values():
+            total += sys.getsizeof(cells)
+            for key, points in cells.items():
+                total += sys.getsizeof(key) + sys.getsizeof(points)
+        return total
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "points": self.point_count,
+            "types": len(self._grids),
+            "cells": sum(len(cells) for cells in self._grids.values()),
+            "memory_bytes": self.memory_bytes(),
+        }
+
+
+def build_index(db) -> POIIndex:
+    """Loads every scoring POI from the database into a fresh index."""
+    version = data_versions.current_version(db, "pois")
+    index = POIIndex(version)
+    rows = db.execute(
+        text("SELECT type, ST_Y(geom::geometry), ST_X(geom::geometry) FROM pois WHERE type = ANY(:types)"),
+        {"types": ranking_service.scored_poi_types()},
+    )
+    for poi_type, lat, lon in rows:
+        index.add(poi_type, lat, lon)
+    return index.finalize()
+
+
+# --- Process-wide instance ---
+_index: Optional[POIIndex] = None
+_refresher: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+
+def get_index() -> Optional[POIIndex]:
+    """Returns the loaded index, or None when the index is disabled."""
+    return _index
+
+def load(session_factory) -> POIIndex:
+    global _index
+    db = session_factory()
+    try:
+        _index = build_index(db)
+    finally:
+        db.close()
+    logger.info("POI index loaded: %s", _index.stats())
+    return _index
+
+def _refresh_loop(session_factory, interval_seconds: float) -> None:
+    while not _stop.wait(interval_seconds):
+        try:
+            db = session_factory()
+            try:
+                version = data_versions.current_version(db, "pois")
+            finally:
+                db.close()
+            if _index is None or version != _index.version:
+                load(session_factory)
+        except Exception:
+            logger.exception("POI index refresh failed; keeping the previous index")
+
+def start(session_factory, refresh_seconds: float) -> None:
+    """Loads the index and starts the background thread that reloads it on version bumps."""
+    global _refresher
+    load(session_factory)
+    _stop.clear()
+    _refresher = threading.Thread(
+        target=_refresh_loop, args=(session_factory, refresh_seconds), name="poi-index-refresh", daemon=True
+    )
+    _refresher.start()
+
+def stop() -> None:
+    global _index
+    _stop.set()
+    _index = None
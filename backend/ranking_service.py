@@ -1,9 +1,15 @@
 # backend/ranking_service.py
 from sqlalchemy.orm import Session
-from sqlalchemy import func, text
-from models import Complaint, Vote
-from typing import Optional
+from sqlalchemy import text
+from models import Complaint
+from typing import NamedTuple, Optional, List, Dict, Tuple, Sequence
 from geoalchemy2.shape import to_shape
+import numpy as np
+import json
+import os
+import time
+import poi_index
+import codes
 
 # --- Scoring Constants ---
 LOCATION_SCORES = {
@@ -27,13 +33,87 @@ SEVERITY_MAPPING = {
     "Sanitation": 5, "default": 3
 }
 
+# POIs within this many metres of a complaint count towards its location score
+LOCATION_RADIUS_M = 500
+
 # --- Formula Weights ---
-W_SEVERITY, W_VOTES, W_LOCATION = 0.5, 0.2, 0.3
+class Weights(NamedTuple):
+    severity: float
+    votes: float
+    location: float
+
+# Swapped as a whole by load_weights; scorers read it once per call
+WEIGHTS = Weights(severity=0.5, votes=0.2, location=0.3)
+
+
+# Optional JSON file overriding the weights above; see load_weights()
+WEIGHTS_FILE: Optional[str] = None
+WEIGHTS_CHECK_INTERVAL_S = 5.0
+_weights_mtime: Optional[float] = None
+_weights_checked_at = 0.0
+
+# Priority buckets used by assign_priority_from_score, lowest first
+PRIORITY_LEVELS = np.array(['low', 'medium', 'high', 'critical'])
+PRIORITY_THRESHOLDS = np.array([2, 5, 7])
+
+
+def load_weights(path: str) -> dict:
+    """
+    Loads scoring weights from a JSON file and swaps them in, e.g.
+    {"weights": {"severity": 0.5, "votes": 0.2, "location": 0.3},
+     "severity_mapping": {"Electricity": 10, ..., "default": 3}}
+    Either key may be omitted. Returns the active configuration.
+    """
+    global WEIGHTS, SEVERITY_MAPPING, WEIGHTS_FILE, _weights_mtime
+    with open(path, "r") as f:
+        config = json.load(f)
+
+    weights = config.get("weights", {})
+    WEIGHTS = Weights(*(float(weights.get(name, current)) for name, current in WEIGHTS._asdict().items()))
+
+    if "severity_mapping" in config:
+        mapping = {k: int(v) for k, v in config["severity_mapping"].items()}
+        mapping.setdefault("default", SEVERITY_MAPPING["default"])
+        # Rebound, never mutated: a scorer holding the previous mapping keeps a consistent one
+        SEVERITY_MAPPING = mapping
+
+    WEIGHTS_FILE = path
+    _weights_mtime = os.path.getmtime(path)
+    return current_weights()
+
+def current_weights() -> dict:
+    return {
+        "weights": WEIGHTS._asdict(),
+        "severity_mapping": dict(SEVERITY_MAPPING),
+    }
+
+def reload_weights_if_changed() -> bool:
+    """
+    Re-reads WEIGHTS_FILE when it has been modified, checking at most every
+    WEIGHTS_CHECK_INTERVAL_S seconds, so every worker picks up a policy change
+    without a restart. Returns True if new weights were applied.
+    """
+    global _weights_checked_at
+    if not WEIGHTS_FILE:
+        return False
+    now = time.monotonic()
+    if now - _weights_checked_at < WEIGHTS_CHECK_INTERVAL_S:
+        return False
+    _weights_checked_at = now
+    try:
+        if os.path.getmtime(WEIGHTS_FILE) == _weights_mtime:
+            return False
+        load_weights(WEIGHTS_FILE)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not reload ranking weights from {WEIGHTS_FILE}: {e}")
+        return False
+    return True
 
 
 def calculate_severity_score(department: str) -> int:
     """Calculates the severity score based on the department."""
-    return SEVERITY_MAPPING.get(department, SEVERITY_MAPPING["default"])
+    mapping = SEVERITY_MAPPING
+    return mapping.get(department, mapping["default"])
 
 def assign_priority_from_score(score: int) -> str:
     """Assigns a priority level ('critical', 'high', etc.) from a numerical score."""
@@ -46,41 +126,244 @@ def assign_priority_from_score(score: int) -> str:
     else:
         return 'low'
 
-def get_location_score(complaint: Complaint, db: Session) -> int:
-    """Calculates the max location score by performing the entire calculation in the database."""
+def _location_case_sql() -> str:
+    """Builds the CASE expression that maps a POI type to its LOCATION_SCORES weight."""
+    case_statement = " ".join([f"WHEN type = '{k}' THEN {v}" for k, v in LOCATION_SCORES.items()])
+    return f"CASE {case_statement} ELSE 0 END"
+
+def scored_poi_types() -> List[str]:
+    """POI types with a positive LOCATION_SCORES weight; the others never set a location score or type."""
+    return [poi_type for poi_type, weight in LOCATION_SCORES.items() if weight > 0]
+
+def lookup_location_score(complaint: Complaint, db: Session) -> Tuple[int, Optional[str]]:
+    """
+    Runs the POI proximity lookup for a complaint and returns
+    (max LOCATION_SCORES weight, type of the POI that produced it), or
+    (0, None) when no scored POI is in range, with or without the POI index.
+    """
     if not complaint.location:
-        return 0
+        return 0, None
 
     point = to_shape(complaint.location)
+
+    # Answer from the in-memory POI index when it is enabled (no DB round trip)
+    index = poi_index.get_index()
+    if index is not None:
+        return index.location_score(point.y, point.x)
+
     complaint_wkt = f'POINT({point.x} {point.y})'
-    
-    # This CASE statement lets the database calculate the score for each POI type
-    case_statement = " ".join([f"WHEN type = '{k}' THEN {v}" for k, v in LOCATION_SCORES.items()])
 
-    # A more efficient query that finds the maximum score directly in the DB
+    # Highest-weighted POI in range wins; ties go to the closest one
     sql_query = text(f"""
-        SELECT MAX(CASE {case_statement} ELSE 0 END)
+        SELECT type, {_location_case_sql()} AS weight
         FROM pois
-        WHERE ST_DWithin(geom, ST_GeogFromText(:complaint_loc), 500)
+        WHERE ST_DWithin(geom, ST_GeogFromText(:complaint_loc), {LOCATION_RADIUS_M})
+          AND type = ANY(:scored_types)
+        ORDER BY weight DESC, ST_Distance(geom, ST_GeogFromText(:complaint_loc))
+        LIMIT 1
     """)
-    
-    max_score = db.execute(sql_query, {"complaint_loc": complaint_wkt}).scalar_one_or_none()
-    
-    return max_score or 0
+
+    row = db.execute(sql_query, {"complaint_loc": complaint_wkt, "scored_types": scored_poi_types()}).first()
+    if not row:
+        return 0, None
+    return row.weight or 0, row.type
+
+def assign_location_score(complaint: Complaint, db: Session) -> int:
+    """
+    Computes the location component once and caches it on the complaint.
+    A complaint's location never changes, so this only needs to run at creation
+    (and again through backfill_location_scores after a POI reimport).
+    """
+    complaint.location_score, complaint.location_poi_type = lookup_location_score(complaint, db)
+    return complaint.location_score
+
+def get_location_score(complaint: Complaint, db: Session) -> int:
+    """Returns the cached location score, falling back to a live POI query for rows not yet backfilled."""
+    if complaint.location_score is not None:
+        return complaint.location_score
+    score, _ = lookup_location_score(complaint, db)
+    return score
+
+def encode_departments(
+    departments: Sequence[Optional[str]],
+    severity_mapping: Optional[Dict[str, int]] = None,
+) -> np.ndarray:
+    """
+    Maps department names to integer codes for score_arrays: the position of the
+    department in severity_mapping (default: the current SEVERITY_MAPPING), or
+    of "default" for unknown departments. Pass score_arrays the same mapping.
+    """
+    if severity_mapping is None:
+        reload_weights_if_changed()
+        severity_mapping = SEVERITY_MAPPING
+    codes = {name: i for i, name in enumerate(severity_mapping)}
+    default = codes["default"]
+    return np.fromiter((codes.get(d, default) for d in departments), dtype=np.int16, count=len(departments))
+
+def score_arrays(
+    department_codes: np.ndarray,
+    not_resolved_votes: Sequence[int],
+    location_scores: Sequence[int],
+    severity_mapping: Optional[Dict[str, int]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized version of _weighted_score + assign_priority_from_score.
+    Takes column arrays (department codes from encode_departments, not_resolved
+    vote counts, location scores) and returns (scores, priority buckets).
+    The codes index severity_mapping, so it must be the mapping they were
+    encoded with; it defaults to the current SEVERITY_MAPPING.
+    """
+    if severity_mapping is None:
+        reload_weights_if_changed()
+        severity_mapping = SEVERITY_MAPPING
+    severity_lut = np.fromiter(severity_mapping.values(), dtype=np.float64, count=len(severity_mapping))
+    severity = severity_lut[np.asarray(department_codes)]
+    votes = np.asarray(not_resolved_votes, dtype=np.float64)
+    location = np.asarray(location_scores, dtype=np.float64)
+
+    w = WEIGHTS
+    scores = np.round(w.severity * severity + w.votes * (votes * 2) + w.location * location, 2)
+    priorities = PRIORITY_LEVELS[np.searchsorted(PRIORITY_THRESHOLDS, scores, side='right')]
+    return scores, priorities
+
+def _weighted_score(department: Optional[str], not_resolved_votes: int, location_score: int) -> float:
+    """Combines the three components into the final, rounded priority score."""
+    reload_weights_if_changed()
+    s_score = calculate_severity_score(department)
+    v_score = not_resolved_votes * 2
+    w = WEIGHTS
+    priority_score = (w.severity * s_score) + (w.votes * v_score) + (w.location * location_score)
+    return round(priority_score, 2)
+
+def priority_score_sql(department: str, not_resolved_votes: str, location_score: str) -> str:
+    """
+    SQL expression computing the same rounded score as _weighted_score from the
+    given column expressions, so write paths can rescore inside their UPDATE.
+    """
+    reload_weights_if_changed()
+    mapping = SEVERITY_MAPPING
+    whens = " ".join(
+        f"WHEN '{name.replace(chr(39), chr(39) * 2)}' THEN {weight}"
+        for name, weight in mapping.items() if name != "default"
+    )
+    severity = f"CASE {department} {whens} ELSE {mapping['default']} END"
+    w = WEIGHTS
+    return (
+        f"ROUND(({w.severity} * ({severity}) + {w.votes} * 2 * ({not_resolved_votes})"
+        f" + {w.location} * COALESCE({location_score}, 0))::numeric, 2)::double precision"
+    )
 
 def calculate_priority_score(complaint: Complaint, db: Session) -> float:
     """Calculates the final weighted priority score for a single complaint."""
-    
-    s_score = calculate_severity_score(complaint.department)
-    
-    vote_count = db.query(func.count(Vote.id)).filter(
-        Vote.complaint_id == complaint.id,
-        Vote.vote_type == 'not_resolved'
-    ).scalar() or 0
-    v_score = vote_count * 2
-    
     l_score = get_location_score(complaint, db)
-    
-    priority_score = (W_SEVERITY * s_score) + (W_VOTES * v_score) + (W_LOCATION * l_score)
-    
-    return round(priority_score, 2)
\ No newline at end of file
+
+    return _weighted_score(complaint.department, complaint.not_resolved_votes or 0, l_score)
+
+def _score_components(
+    db: Session,
+    complaint_ids: Optional[List[int]] = None,
+    unresolved_only: bool = False,
+) -> Tuple[List[int], List[Optional[str]], List[int], List[int]]:
+    """
+    Fetches the raw scoring inputs for every matching complaint in one set-based
+    query (vote counters + a LATERAL POI lookup per row) as column lists:
+    (ids, departments, not_resolved vote counts, location scores).
+    """
+    conditions = []
+    params = {}
+    if complaint_ids is not None:
+        if not complaint_ids:
+            return [], [], [], []
+        conditions.append("c.id = ANY(:complaint_ids)")
+        params["complaint_ids"] = list(complaint_ids)
+    if unresolved_only:
+        conditions.append(f"c.status_code = {codes.STATUS_UNRESOLVED}")
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    sql_query = text(f"""
+        SELECT c.id, c.department, c.not_resolved_votes,
+               COALESCE(c.location_score, l.location_score, 0)
+        FROM complaints c
+        LEFT JOIN LATERAL (
+            -- Only complaints without a cached location_score pay for the spatial lookup
+            SELECT MAX({_location_case_sql()}) AS location_score
+            FROM pois
+            WHERE c.location_score IS NULL AND ST_DWithin(pois.geom, c.location, {LOCATION_RADIUS_M})
+        ) l ON TRUE
+        {where_clause}
+    """)
+
+    rows = db.execute(sql_query, params).all()
+    if not rows:
+        return [], [], [], []
+    ids, departments, vote_counts, location_scores = (list(col) for col in zip(*rows))
+    return ids, departments, vote_counts, location_scores
+
+def calculate_priority_scores(
+    db: Session,
+    complaint_ids: Optional[List[int]] = None,
+    unresolved_only: bool = False,
+) -> Dict[int, float]:
+    """
+    Batch version of calculate_priority_score. Fetches the inputs for every
+    matching complaint in one query, scores them with the vectorized kernel and
+    returns {complaint_id: score}. Scores are identical to the per-row function.
+    """
+    ids, departments, vote_counts, location_scores = _score_components(db, complaint_ids, unresolved_only)
+    if not ids:
+        return {}
+    reload_weights_if_changed()
+    mapping = SEVERITY_MAPPING
+    scores, _ = score_arrays(encode_departments(departments, mapping), vote_counts, location_scores, mapping)
+    return dict(zip(ids, scores.tolist()))
+
+
+def backfill_location_scores(db: Session, complaint_ids: Optional[List[int]] = None) -> int:
+    """
+    Recomputes the cached location_score / location_poi_type for the given
+    complaints (or all of them) in one UPDATE. Run after import_pois.py reloads
+    the POI table, then refresh_scores to carry the change into Complaint.score.
+    Returns the number of rows updated; the caller commits.
+    """
+    params = {"scored_types": scored_poi_types()}
+    id_filter = ""
+    if complaint_ids is not None:
+        if not complaint_ids:
+            return 0
+        id_filter = "AND c.id = ANY(:complaint_ids)"
+        params["complaint_ids"] = list(complaint_ids)
+
+    sql_query = text(f"""
+        UPDATE complaints c
+        SET location_score = COALESCE(l.weight, 0), location_poi_type = l.type
+        FROM complaints src
+        LEFT JOIN LATERAL (
+            SELECT type, {_location_case_sql()} AS weight
+            FROM pois
+            WHERE ST_DWithin(pois.geom, src.location, {LOCATION_RADIUS_M})
+              AND pois.type = ANY(:scored_types)
+            ORDER BY weight DESC, ST_Distance(pois.geom, src.location)
+            LIMIT 1
+        ) l ON TRUE
+        WHERE c.id = src.id {id_filter}
+    """)
+    return db.execute(sql_query, params).rowcount
+
+def refresh_scores(db: Session, complaint_ids: Optional[List[int]] = None) -> int:
+    """
+    Recomputes and persists Complaint.score for the given complaints (or all of them)
+    with one read and one set-based UPDATE. Call after an input changes in bulk,
+    e.g. a POI reimport or a weights reload.
+    Returns the number of rows updated; the caller commits.
+    """
+    scores = calculate_priority_scores(db, complaint_ids=complaint_ids)
+    if scores:
+        db.execute(
+            text("""
+                UPDATE complaints c SET score = v.score
+                FROM unnest(CAST(:ids AS integer[]), CAST(:scores AS double precision[])) AS v(id, score)
+                WHERE c.id = v.id
+            """),
+            {"ids": list(scores.keys()), "scores": list(scores.values())},
+        )
+    return len(scores)
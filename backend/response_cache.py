@@ -0,0 +1,203 @@
+# backend/response_cache.py
+"""
+Response cache for the read-heavy list endpoints.
+
+Entries hold the serialized JSON body (plus the next-page cursor) and are
+keyed by dataset, that dataset's data version and a digest of the request.
+Because the version is part of the key, an entry can never be served after
+its dataset changed, even from another worker process. On top of that,
+data_changes calls invalidate() after every write, so superseded entries are
+dropped right away instead of waiting for their TTL.
+
+Backends:
+  memory  in-process LRU with a TTL (default)
+  redis   any Redis-protocol server at REDIS_URL (needs the `redis` package)
+  none    caching disabled
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+from fastapi import Request, Response
+
+import data_versions
+import etags
+import pagination
+from config import settings
+
+# (JSON body, next cursor)
+Entry = Tuple[bytes, Optional[str]]
+
+
+class MemoryBackend:
+    """LRU + TTL dict, with a per-dataset key index so invalidation is O(entries of that dataset)."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str, Entry]]" = OrderedDict()
+        self._by_dataset = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Entry]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, dataset, entry = item
+            if expires_at < time.monotonic():
+                self._remove(key, dataset)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, dataset: str, entry: Entry) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key, self._entries[key][1])
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, dataset, entry)
+            self._by_dataset.setdefault(dataset, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest, (_, oldest_dataset, _) = next(iter(self._entries.items()))
+                self._remove(oldest, oldest_dataset)
+                self.evictions += 1
+
+    def invalidate(self, dataset: str) -> int:
+        with self._lock:
+            keys = self._by_dataset.pop(dataset, set())
+            for key in keys:
+                self._entries.pop(key, None)
+            return len(keys)
+
+    def _remove(self, key: str, dataset: str) -> None:
+        del self._entries[key]
+        self._by_dataset.get(dataset, set()).discard(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class RedisBackend:
+    """Shared cache in a Redis-protocol server. Expiry and eviction are left to the server."""
+
+    PREFIX = "civic:cache:"
+
+    def __init__(self, url: str, ttl_seconds: int):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis needs the 'redis' package (pip install redis)")
+        self._redis = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key: str) -> Optional[Entry]:
+        raw = self._redis.get(self.PREFIX + key)
+        if raw is None:
+            return None
+        cursor, _, body = raw.partition(b"\n")
+        return body, cursor.decode() or None
+
+    def set(self, key: str, dataset: str, entry: Entry) -> None:
+        body, cursor = entry
+        tag = f"{self.PREFIX}tag:{dataset}"
+        pipe = self._redis.pipeline()
+        pipe.set(self.PREFIX + key, (cursor or "").encode() + b"\n" + body, ex=self.ttl_seconds)
+        pipe.sadd(tag, self.PREFIX + key)
+        pipe.expire(tag, self.ttl_seconds)
+        pipe.execute()
+
+    def invalidate(self, dataset: str) -> int:
+        tag = f"{self.PREFIX}tag:{dataset}"
+        keys = self._redis.smembers(tag)
+        if keys:
+            self._redis.delete(*keys)
+        self._redis.delete(tag)
+        return len(keys)
+
+    def stats(self) -> dict:
+        info = self._redis.info("stats")
+        return {"evictions": info.get("evicted_keys"), "expirations": info.get("expired_keys")}
+
+
+_backend = None
+_counters = {"hits": 0, "misses": 0, "invalidations": 0}
+_counters_lock = threading.Lock()
+
+
+def configure(backend: str, ttl_seconds: int, max_entries: int, redis_url: Optional[str] = None) -> None:
+    global _backend
+    if backend == "none":
+        _backend = None
+    elif backend == "memory":
+        _backend = MemoryBackend(max_entries, ttl_seconds)
+    elif backend == "redis":
+        if not redis_url:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis needs REDIS_URL")
+        _backend = RedisBackend(redis_url, ttl_seconds)
+    else:
+        raise ValueError(f"Unknown response cache backend '{backend}'")
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _counters_lock:
+        _counters[name] += n
+
+
+def respond(
+    db,
+    request: Request,
+    dataset: str,
+    build: Callable[[], Tuple[List[dict], Optional[str]]],
+    variant: Optional[str] = None,
+) -> Response:
+    """
+    Serves `request` from the cache, or calls build() -> (payload, next_cursor),
+    caches the encoded body and serves that.
+    """
+    if _backend is None:
+        payload, next_cursor = build()
+        entry = (json.dumps(payload).encode(), next_cursor)
+    else:
+        key = f"{dataset}:{data_versions.current_version(db, dataset)}:{etags.request_digest(request, variant)}"
+        entry = _backend.get(key)
+        if entry is not None:
+            _count("hits")
+        else:
+            _count("misses")
+            payload, next_cursor = build()
+            entry = (json.dumps(payload).encode(), next_cursor)
+            _backend.set(key, dataset, entry)
+
+    body, next_cursor = entry
+    response = Response(content=body, media_type="application/json")
+    pagination.set_next_cursor(response, next_cursor)
+    return response
+
+
+def invalidate(dataset: str) -> None:
+    """Drops every cached response built from `dataset`. Called by data_changes after writes."""
+    if _backend is not None:
+        _count("invalidations", _backend.invalidate(dataset))
+
+
+def stats() -> dict:
+    with _counters_lock:
+        counters = dict(_counters)
+    lookups = counters["hits"] + counters["misses"]
+    return {
+        "backend": settings.RESPONSE_CACHE_BACKEND if _backend is not None else "none",
+        **counters,
+        "hit_ratio": round(counters["hits"] / lookups, 3) if lookups else None,
+        **(_backend.stats() if _backend is not None else {}),
+    }
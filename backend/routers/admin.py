@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Query, Response
 from sqlalchemy.orm import Session
 from database import get_db
 import models, schemas
@@ -6,10 +6,22 @@ from geoalchemy2.shape import to_shape
 from shapely.geometry import mapping
 from schemas import ProcessUpdate
 from models import Complaint, VerifiedIssue
-from sqlalchemy import func
 from sqlalchemy import or_
 from schemas import StatusUpdate
 import ranking_service
+import pagination
+import serializers
+import data_changes
+import etags
+import response_cache
+import codes
+import uploads
+import derivatives
+import tiles
+from typing import List, Optional
+import poi_index
+import time
+from config import settings
 
 router = APIRouter(
     prefix="/admin",
@@ -19,35 +31,36 @@ router = APIRouter(
 from fastapi import Request
 
 @router.get("/complaints")
-def get_all_complaints(request: Request, db: Session = Depends(get_db)):
-    complaints = db.query(models.Complaint).all()
-    result = []
-    for c in complaints:
-        geom = to_shape(c.location) if c.location else None
-        
-        # Fix image_url here
-        if c.image_url:
-            # Remove leading slash if present
-            img_path = c.image_url.lstrip("/")
-            image_url = str(request.base_url) + img_path
-        else:
-            image_url = None
-
-        result.append({
-            "id": c.id,
-            "user_id": c.user_id,
-            "title": c.title,
-            "description": c.description,
-            "department": c.department,
-            "status": c.status,
-            "priority": c.priority,
-            "image_url": image_url,
-            "location": mapping(geom) if geom else None,
-            "locationName": c.locationName,
-            "created_at": c.created_at.isoformat() if c.created_at else None,
-            "process": c.process
-        })
-    return result
+def get_all_complaints(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    format: str = Query("json", pattern=serializers.FORMAT_PATTERN),
+    db: Session = Depends(get_db),
+):
+    """
+    All complaints, newest first. `?format=ndjson` streams one JSON object per
+    line straight from a server-side cursor instead of building the whole list.
+    Answers If-None-Match with 304 while no complaint has changed.
+    """
+    image_base_url = str(request.base_url)
+    etag = etags.compute(db, request, "complaints", variant=image_base_url)
+    if etags.is_fresh(request, etag):
+        return etags.not_modified(etag)
+
+    stmt = serializers.select_fields(Complaint, serializers.ADMIN_LIST_FIELDS)
+    if format == "ndjson":
+        stmt = pagination.ordered(stmt, pagination.COMPLAINTS_NEWEST_FIRST, cursor)
+        return serializers.ndjson_response(
+            stmt.limit(limit) if limit else stmt, serializers.ADMIN_LIST_FIELDS,
+            headers={etags.ETAG_HEADER: etag, "Cache-Control": "no-cache"}, image_base_url=image_base_url,
+        )
+
+    etags.set_etag(response, etag)
+    rows, next_cursor = pagination.paginate(db, stmt, pagination.COMPLAINTS_NEWEST_FIRST, limit, cursor)
+    pagination.set_next_cursor(response, next_cursor)
+    return serializers.serialize_rows(rows, serializers.ADMIN_LIST_FIELDS, image_base_url=image_base_url)
 
 
 
@@ -70,6 +83,7 @@ def get_complaint(complaint_id: int, db: Session = Depends(get_db)):
         "priority": complaint.priority,
         "process": complaint.process,
         "image_url": complaint.image_url,
+        "thumbnail_url": complaint.thumbnail_url,
         "locationName": complaint.locationName,
         "location": mapping(geom) if geom else None,
         "created_at": complaint.created_at.isoformat() if complaint.created_at else None,
@@ -93,7 +107,12 @@ def update_complaint(
     for key, value in update_data.items():
         setattr(complaint, key, value)
 
+    # Department feeds the severity component of the stored score
+    if "department" in update_data:
+        complaint.score = ranking_service.calculate_priority_score(complaint, db)
+
     db.commit()
+    data_changes.complaints_changed(db, [complaint_id])
     db.refresh(complaint)
 
     geom = to_shape(complaint.location) if complaint.location else None
@@ -105,6 +124,7 @@ def update_report_urgency(id: int, data: schemas.UrgencyUpdate, db: Session = De
     
     report.priority = data.urgency
     db.commit()
+    data_changes.complaints_changed(db, [id])
     db.refresh(report)
 
     geom = to_shape(report.location) if report.location else None
@@ -119,6 +139,7 @@ def update_report_urgency(id: int, data: schemas.UrgencyUpdate, db: Session = De
         "priority": report.priority,
         "process": report.process,
         "image_url": report.image_url,
+        "thumbnail_url": report.thumbnail_url,
         "locationName": report.locationName,
         "location": mapping(geom) if geom else None,
         "created_at": report.created_at.isoformat() if report.created_at else None,
@@ -132,6 +153,7 @@ def update_process(id: int, data: ProcessUpdate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Complaint not found")
     complaint.process = data.process
     db.commit()
+    data_changes.complaints_changed(db, [id])
     return {"message": "Process updated successfully"}
     
 @router.put("/complaints/{id}/department")
@@ -141,7 +163,9 @@ def update_department(id: int, data: schemas.DepartmentUpdate, db: Session = Dep
         raise HTTPException(status_code=404, detail="Complaint not found")
     
     complaint.department = data.department
+    complaint.score = ranking_service.calculate_priority_score(complaint, db)
     db.commit()
+    data_changes.complaints_changed(db, [id])
     db.refresh(complaint)
     return {"message": "Department updated successfully"}
 
@@ -169,6 +193,7 @@ def update_status(id: int, data: StatusUpdate, db: Session = Depends(get_db)):
             db.add(verified)
             db.commit()
             db.refresh(verified)
+    data_changes.complaints_changed(db, [id], verified=data.status == "Resolved")
     return {"message": "Status updated successfully", "status": complaint.status}
 
 
@@ -177,93 +202,117 @@ def update_status(id: int, data: StatusUpdate, db: Session = Depends(get_db)):
 
 @router.get("/filter", response_model=None)  # <-- Disable Pydantic inference
 def filter_complaints(
+    request: Request,
     db: Session = Depends(get_db),
-    department: str = None,
-    process: str = None,
-    status: str = None,
-    priority: str = None,
-    partial: bool = True
+    department: Optional[List[str]] = Query(None),
+    process: Optional[List[str]] = Query(None),
+    status: Optional[List[str]] = Query(None),
+    priority: Optional[List[str]] = Query(None),
+    partial: bool = True,
+    limit: Optional[int] = Query(None, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
 ):
-    query = db.query(Complaint)
+    """
+    Complaints matching every given filter, newest first. Each filter takes
+    several values (?status=a&status=b or ?status=a,b). Values are resolved to
+    canonical codes (codes.py), so 'Resolved' and 'resolved' are the same and
+    the query runs on the indexed *_code columns. With partial=true (default)
+    process/status/priority values match every label containing them.
+    """
+    query = serializers.select_fields(Complaint, serializers.FILTER_FIELDS)
+    filters = (
+        (codes.DEPARTMENT, Complaint.department_code, Complaint.department, department, False),
+        (codes.PROCESS, Complaint.process_code, Complaint.process, process, partial),
+        (codes.STATUS, Complaint.status_code, Complaint.status, status, partial),
+        (codes.PRIORITY, Complaint.priority_code, Complaint.priority, priority, partial),
+    )
+    for vocabulary, code_column, label_column, values, match_partial in filters:
+        condition = codes.code_filter(
+            vocabulary, code_column, label_column, codes.split_values(values), match_partial
+        )
+        if condition is not None:
+            query = query.where(condition)
+
+    def build():
+        rows, next_cursor = pagination.paginate(db, query, pagination.COMPLAINTS_NEWEST_FIRST, limit, cursor)
+        return serializers.serialize_rows(rows, serializers.FILTER_FIELDS), next_cursor
+
+    return response_cache.respond(db, request, "complaints", build)
 
-    if department:
-        query = query.filter(Complaint.department == department)
+@router.get("/complaints/ranked")
+def get_ranked_complaints(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Gets unresolved complaints sorted from most to least critical, a page at a time.
+    Reads the persisted score, which is kept current whenever one of its inputs
+    changes, so each page is a single range scan of ix_complaints_unresolved_score_id.
+    """
+    image_base_url = str(request.base_url)
 
-    if process:
-        if partial:
-            query = query.filter(Complaint.process.ilike(f"%{process}%"))
-        else:
-            query = query.filter(
-                func.coalesce(func.lower(func.trim(Complaint.process)), '') == process.strip().lower()
-            )
+    def build():
+        rows, next_cursor = pagination.paginate(
+            db,
+            serializers.select_fields(Complaint, serializers.RANKED_FIELDS)
+            .where(Complaint.status_code == codes.STATUS_UNRESOLVED),
+            pagination.COMPLAINTS_RANKED, limit, cursor,
+        )
+        return serializers.serialize_rows(rows, serializers.RANKED_FIELDS, image_base_url=image_base_url), next_cursor
 
-    if status:
-        if partial:
-            query = query.filter(Complaint.status.ilike(f"%{status}%"))
-        else:
-            query = query.filter(
-                func.coalesce(func.lower(func.trim(Complaint.status)), '') == status.strip().lower()
-            )
+    return response_cache.respond(db, request, "complaints", build, variant=image_base_url)
 
-    if priority:
-        if partial:
-            query = query.filter(Complaint.priority.ilike(f"%{priority}%"))
-        else:
-            query = query.filter(
-                func.coalesce(func.lower(func.trim(Complaint.priority)), '') == priority.strip().lower()
-            )
 
-    complaints = query.all()
-
-    result = []
-    for c in complaints:
-        geom = to_shape(c.location) if c.location else None
-        result.append({
-            "id": c.id,
-            "title": c.title,
-            "description": c.description,
-            "department": c.department,
-            "status": c.status,
-            "priority": c.priority,
-            "process": c.process,
-            "image_url": c.image_url,
-            "location": mapping(geom) if geom else None,
-            "created_at": c.created_at.isoformat() if c.created_at else None,
-            "locationName": c.locationName
-        })
-
-    return result
+@router.get("/poi-index")
+def get_poi_index_stats():
+    """Reports whether the in-memory POI index is loaded, its version and memory footprint."""
+    index = poi_index.get_index()
+    if index is None:
+        return {"enabled": False}
+    return {"enabled": True, **index.stats()}
 
-@router.get("/complaints/ranked")
-def get_ranked_complaints(request: Request, db: Session = Depends(get_db)):
+
+
+@router.get("/uploads")
+def get_upload_stats():
+    """Upload counts, rejections, throughput and recent latency percentiles, plus the resize pool's counters."""
+    return {**uploads.metrics.stats(), "derivatives": derivatives.stats()}
+
+
+@router.get("/tiles")
+def get_tile_cache_stats():
+    """Size of the on-disk tile cache against its cap, and how many tiles were evicted."""
+    return tiles.stats()
+
+
+@router.get("/cache")
+def get_response_cache_stats():
+    """Hit/miss/eviction counters of the list response cache."""
+    return response_cache.stats()
+
+
+@router.post("/ranking/reload")
+def reload_ranking_weights(db: Session = Depends(get_db)):
     """
-    Gets all unresolved complaints, calculates a priority score for each,
-    and returns them sorted from most to least critical.
+    Re-reads the ranking weights file and re-ranks the whole backlog with the
+    vectorized scorer, so a policy change applies without a restart.
     """
-    unresolved_complaints = db.query(models.Complaint).filter(models.Complaint.status != 'resolved').all()
-    
-    ranked_list = []
-    for c in unresolved_complaints:
-        score = ranking_service.calculate_priority_score(c, db)
-        
-        geom = to_shape(c.location) if c.location else None
-        img_path = c.image_url.lstrip("/") if c.image_url else None
-        image_url = str(request.base_url) + img_path if img_path else None
-
-        ranked_list.append({
-            "score": score,
-            "id": c.id,
-            "title": c.title,
-            "description": c.description,
-            "department": c.department,
-            "status": c.status,
-            "image_url": image_url,
-            "location": mapping(geom) if geom else None,
-            "locationName": c.locationName,
-            "created_at": c.created_at.isoformat() if c.created_at else None,
-        })
-
-    # Sort the final list by score, with the highest score first
-    ranked_list.sort(key=lambda x: x['score'], reverse=True)
-    
-    return ranked_list
+    path = ranking_service.WEIGHTS_FILE or settings.RANKING_WEIGHTS_FILE
+    if not path:
+        raise HTTPException(status_code=400, detail="RANKING_WEIGHTS_FILE is not configured")
+    try:
+        weights = ranking_service.load_weights(path)
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not load ranking weights: {e}")
+
+    start = time.perf_counter()
+    rescored = ranking_service.refresh_scores(db)
+    db.commit()
+    data_changes.scores_changed(db)
+    return {
+        **weights,
+        "rescored": rescored,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
@@ -6,7 +6,7 @@ from typing import Optional
 import json
 from schemas import AIResponse
 import logging
-from image_classifier import predict_issue_from_image_tf
+from image_classifier import classify
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["AIhelp"])
@@ -59,7 +59,8 @@ async def ai_assist(
     if image and image.filename:
         logger.info(f"Image uploaded: {image.filename}, running TF model...")
         image_bytes = await image.read()
-        predicted_department = predict_issue_from_image_tf(image_bytes)
+        # Decoded in the threadpool, predicted in a batch on the classifier thread
+        predicted_department = await classify(image_bytes)
         logger.info(f"TF Model Prediction -> Department: {predicted_department}")
 
     # --- 2. Call Language Model with Enhanced Context ---
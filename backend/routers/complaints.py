@@ -1,20 +1,36 @@
 # backend/routers/complaints.py
 
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-import os, shutil
-import uuid
+from sqlalchemy.ext.asyncio import AsyncSession
+from geoalchemy2.elements import WKTElement
+from starlette.concurrency import run_in_threadpool
 import models
-from database import get_db
-from shapely.geometry import mapping
-from geoalchemy2.shape import to_shape
+from database import get_db, get_async_db
 import ranking_service
+import pagination
+import serializers
+import map_service
+import data_changes
+import response_cache
+import search_service
+import codes
+import uploads
+import derivatives
+from typing import List, Optional
 
 router = APIRouter(
     prefix="/complaints",
     tags=["Complaints"]
 )
 
+def _score_new_complaint(db: Session, complaint: models.Complaint) -> None:
+    # Cache the POI proximity component once; the location never changes
+    ranking_service.assign_location_score(complaint, db)
+    # Calculate and save the initial overall score
+    complaint.score = ranking_service.calculate_priority_score(complaint, db)
+
+
 @router.post("/register")
 async def register_complaint(
     # --- ADDED user_id as a required form field ---
@@ -26,19 +42,15 @@ async def register_complaint(
     longitude: float = Form(...),
     image: UploadFile = File(None),
     locationName: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Image saving logic
-    image_url = None
-    if image:
-        os.makedirs("uploads", exist_ok=True)
-        filename = f"{uuid.uuid4().hex}_{image.filename}"
-        save_path = os.path.join("uploads", filename)
+    # Image saving logic: streamed, size-capped and type-checked (see uploads.py);
+    # it is stored under its hash together with the complaint insert below
+    staged = None
+    if image and image.filename:
         try:
-            with open(save_path, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
-            image_url = f"/uploads/{filename}"
-        except Exception:
+            staged = await uploads.stage_image(image)
+        except OSError:
             raise HTTPException(status_code=500, detail="Image upload failed")
 
     # Automatically assign priority based on severity
@@ -52,43 +64,103 @@ async def register_complaint(
         description=description,
         department=department,
         priority=initial_priority,
-        image_url=image_url,
-        location=f"SRID=4326;POINT({longitude} {latitude})",
+        image_url=staged.url if staged else None,
+        # Images uploaded before already have their resized copies
+        thumbnail_url=derivatives.url(staged.sha256) if staged and derivatives.exists(staged.sha256) else None,
+        location=WKTElement(f"POINT({longitude} {latitude})", srid=4326),
         locationName=locationName
     )
 
-    db.add(complaint)
-    db.commit()
-    db.refresh(complaint)
+    try:
+        db.add(complaint)
+        await db.flush()
 
-    # Calculate and save the initial overall score
-    initial_score = ranking_service.calculate_priority_score(complaint, db)
-    complaint.score = initial_score
-    db.commit()
+        # The scoring and upload helpers are sync Session code; run_sync runs them on
+        # this session's asyncpg connection, in the same transaction as the insert
+        await db.run_sync(_score_new_complaint, complaint)
+        if staged:
+            await db.run_sync(uploads.store, staged)
+        await db.commit()
+        if staged:
+            # Only once the reference is committed; a failed commit leaves no file behind
+            await run_in_threadpool(uploads.place, staged)
+    finally:
+        if staged:
+            uploads.discard(staged)
+    await data_changes.complaints_changed_async(db, [complaint.id])
+    if staged and complaint.thumbnail_url is None:
+        derivatives.submit(complaint.image_url, staged.sha256)
 
-    return {"message": "Complaint registered successfully", "id": complaint.id, "image_url": image_url}
+    return {
+        "message": "Complaint registered successfully",
+        "id": complaint.id,
+        "image_url": complaint.image_url,
+        "thumbnail_url": complaint.thumbnail_url,
+    }
 
 
 @router.get("/all")
-def get_complaints(db: Session = Depends(get_db)):
-    # ... (this function remains the same)
-    complaints = db.query(models.Complaint).all()
-    result = []
-    for c in complaints:
-        geom = to_shape(c.location) if c.location else None
-        result.append({
-            "id": c.id,
-            "title": c.title,
-            "description": c.description,
-            "department": c.department,
-            "status": c.status,
-            "process": c.process,
-            "image_url": c.image_url,
-            "location": mapping(geom) if geom else None,
-            "created_at": c.created_at.isoformat() if c.created_at else None,
-            "locationName": c.locationName
-        })
-    return result
+def get_complaints(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    format: str = Query("json", pattern=serializers.FORMAT_PATTERN),
+    db: Session = Depends(get_db),
+):
+    """
+    All complaints, newest first. `?format=ndjson` streams one JSON object per
+    line straight from a server-side cursor instead of building the whole list.
+    """
+    stmt = serializers.select_fields(models.Complaint, serializers.COMPLAINT_LIST_FIELDS)
+    if format == "ndjson":
+        stmt = pagination.ordered(stmt, pagination.COMPLAINTS_NEWEST_FIRST, cursor)
+        return serializers.ndjson_response(stmt.limit(limit) if limit else stmt, serializers.COMPLAINT_LIST_FIELDS)
+
+    def build():
+        rows, next_cursor = pagination.paginate(db, stmt, pagination.COMPLAINTS_NEWEST_FIRST, limit, cursor)
+        return serializers.serialize_rows(rows, serializers.COMPLAINT_LIST_FIELDS), next_cursor
+
+    return response_cache.respond(db, request, "complaints", build)
+
+
+@router.get("/search")
+def search_complaints(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    department: Optional[List[str]] = Query(None),
+    status: Optional[List[str]] = Query(None),
+    mode: Optional[str] = Query(None, pattern="^(fulltext|fuzzy)$"),
+    limit: int = Query(20, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Ranked search over complaint titles and descriptions, with <mark>
+    highlights, optionally narrowed by department/status (several values
+    allowed). Falls back to fuzzy title matching when nothing matches exactly;
+    the mode used is returned in X-Search-Mode and must be passed back with
+    the cursor for the next page.
+    """
+    hits, next_cursor, used_mode = search_service.search(
+        db, q, codes.split_values(department), codes.split_values(status), limit, cursor, mode
+    )
+    pagination.set_next_cursor(response, next_cursor)
+    response.headers[search_service.MODE_HEADER] = used_mode
+    return hits
+
+
+@router.get("/map")
+def get_map_complaints(
+    bbox: str = Query(..., description="min_lon,min_lat,max_lon,max_lat"),
+    zoom: int = Query(..., ge=0, le=22),
+    db: Session = Depends(get_db),
+):
+    """
+    Complaints inside the visible map area: individual points from
+    map_service.CLUSTER_MAX_ZOOM upwards, grid clusters (count, per-department
+    counts, max priority) below it.
+    """
+    return map_service.viewport(db, map_service.parse_bbox(bbox), zoom)
 
 
 @router.delete("/{complaint_id}")
@@ -99,6 +171,13 @@ def delete_complaint(complaint_id: int, db: Session = Depends(get_db)):
     if not complaint:
         raise HTTPException(status_code=404, detail="Complaint not found")
 
+    points = data_changes.locate_complaints(db, [complaint_id])
+    image_url = complaint.image_url
+    uploads.release(db, image_url)
     db.delete(complaint)
     db.commit()
+    if uploads.blob_sha256(image_url):
+        uploads.collect_garbage(db)
+        db.commit()
+    data_changes.complaints_changed(db, points=points)
     return {"message": f"Complaint {complaint_id} deleted successfully"}
\ No newline at end of file
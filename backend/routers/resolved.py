@@ -1,30 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from database import get_db
 from models import VerifiedIssue
 from datetime import datetime
 from schemas import VoteCreate 
 import models
-from shapely.geometry import mapping
-from geoalchemy2.shape import to_shape
+from typing import Optional
+import pagination
+import serializers
+import etags
+import response_cache
 
 router = APIRouter(
     prefix="/resolved",
     tags=["resolved"]
 )
 @router.get("/all_resolved")
-def get_complaints(db: Session = Depends(get_db)):
-    verifed = db.query(models.VerifiedIssue).all()
-    result = []
-    for c in verifed:
-        geom = to_shape(c.location) if c.location else None
-        result.append({
-            "id": c.id,
-            "title": c.title,
-            "description": c.description,
-            "department": c.department,
-            "location": mapping(geom) if geom else None,  # shapely -> GeoJSON dict
-            "created_at": c.created_at.isoformat() if c.created_at else None,
-            "locationName": c.locationName
-        })
-    return result
\ No newline at end of file
+def get_complaints(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Verified issues, newest first. Answers If-None-Match with 304 while none has changed."""
+    etag = etags.compute(db, request, "verified_issues")
+    if etags.is_fresh(request, etag):
+        return etags.not_modified(etag)
+
+    def build():
+        rows, next_cursor = pagination.paginate(
+            db, serializers.select_fields(models.VerifiedIssue, serializers.VERIFIED_FIELDS),
+            pagination.VERIFIED_NEWEST_FIRST, limit, cursor,
+        )
+        return serializers.serialize_rows(rows, serializers.VERIFIED_FIELDS), next_cursor
+
+    response = response_cache.respond(db, request, "verified_issues", build)
+    etags.set_etag(response, etag)
+    return response
@@ -0,0 +1,26 @@
+# backend/routers/tiles.py
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.orm import Session
+
+from database import get_db
+import tiles
+
+router = APIRouter(
+    prefix="/tiles",
+    tags=["Tiles"]
+)
+
+@router.get("/complaints/{z}/{x}/{y}.pbf")
+def get_complaint_tile(z: int, x: int, y: int, db: Session = Depends(get_db)):
+    """
+    Vector tile with a `complaints` and a `verified_issues` layer. Served from
+    the on-disk tile cache when possible.
+    """
+    if not tiles.is_valid(z, x, y):
+        raise HTTPException(status_code=404, detail="Tile out of range")
+    data, cached = tiles.get_tile(db, z, x, y)
+    return Response(
+        content=data,
+        media_type=tiles.MEDIA_TYPE,
+        headers={"X-Tile-Cache": "hit" if cached else "miss"},
+    )
@@ -1,15 +1,18 @@
 # backend/routers/votes.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from database import get_db
-from models import Vote, Complaint, VerifiedIssue, User
-from schemas import VoteCreate # For receiving request data
-from datetime import datetime
-import ranking_service
+from models import Complaint
+from schemas import VoteCreate, BatchVoteCreate # For receiving request data
+import vote_service
 import models
-from geoalchemy2.shape import to_shape
+from typing import Optional
+import pagination
+import serializers
+import etags
+import response_cache
+import codes
 
 
 router = APIRouter(
@@ -17,11 +20,16 @@ router = APIRouter(
     tags=["Votes"]
 )
 
-# --- Consolidated Vote Thresholds ---
-RESOLVED_THRESHOLD = 3
-NOT_RESOLVED_THRESHOLD = 3 
-PRIORITY_HIGH_THRESHOLD = 3
-PRIORITY_CRITICAL_THRESHOLD = 6
+@router.post("/batch")
+def vote_batch(batch: BatchVoteCreate, db: Session = Depends(get_db)):
+    """
+    Records many votes in one transaction (offline-synced clients, verification
+    drives). Counters and thresholds are updated once per affected complaint.
+    Declared before /{complaint_id} so "batch" is not parsed as an id.
+    """
+    results = vote_service.cast_votes(db, [(v.user_id, v.complaint_id, v.vote_type) for v in batch.votes])
+    accepted = sum(1 for r in results if r["accepted"])
+    return {"accepted": accepted, "rejected": len(results) - accepted, "results": results}
 
 
 @router.post("/{complaint_id}")
@@ -30,66 +38,10 @@ def vote_on_complaint(
     vote: VoteCreate, # Use Pydantic model to get data from the JSON body
     db: Session = Depends(get_db)
 ):
-    # --- Initial Checks ---
-    complaint = db.query(Complaint).filter(Complaint.id == complaint_id).first()
-    if not complaint:
-        raise HTTPException(status_code=404, detail="Complaint not found")
-
-    user = db.query(User).filter(User.id == vote.user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail=f"User with ID {vote.user_id} not found")
-
-    if vote.vote_type not in ["resolved", "not_resolved"]:
-        raise HTTPException(status_code=400, detail="Invalid vote type")
-
-    existing_vote = db.query(Vote).filter(Vote.user_id == vote.user_id, Vote.complaint_id == complaint_id).first()
-    if existing_vote:
-        raise HTTPException(status_code=400, detail="User has already voted on this complaint")
-
-    # --- 1. Record the New Vote (with timestamp) ---
-    new_vote = Vote(
-        user_id=vote.user_id,
-        complaint_id=complaint_id,
-        vote_type=vote.vote_type,
-        voted_at=datetime.utcnow()
-    )
-    db.add(new_vote)
-
-    # --- 2. Escalate Priority & Recalculate Score ---
-    if vote.vote_type == 'not_resolved':
-        not_resolved_count = db.query(func.count(Vote.id)).filter(
-            Vote.complaint_id == complaint_id, Vote.vote_type == 'not_resolved'
-        ).scalar() or 0
+    # One race-free statement: insert-if-new + row-locked counter/priority/score update
+    outcome = vote_service.cast_vote(db, complaint_id, vote.user_id, vote.vote_type)
 
-        if not_resolved_count >= PRIORITY_CRITICAL_THRESHOLD and complaint.priority != 'critical':
-            complaint.priority = 'critical'
-        elif not_resolved_count >= PRIORITY_HIGH_THRESHOLD and complaint.priority not in ['high', 'critical']:
-            complaint.priority = 'high'
-    
-    complaint.score = ranking_service.calculate_priority_score(complaint, db)
-
-    # --- 3. Check Vote Thresholds ---
-    vote_summary = {vt: count for vt, count in db.query(Vote.vote_type, func.count(Vote.id)).filter(Vote.complaint_id == complaint_id).group_by(Vote.vote_type).all()}
-    
-    if vote_summary.get("resolved", 0) >= RESOLVED_THRESHOLD:
-        complaint.status = "resolved"
-        complaint.process = "verified_resolved"
-        if not db.query(VerifiedIssue).filter(VerifiedIssue.complaint_id == complaint_id).first():
-            db.add(VerifiedIssue(
-                complaint_id=complaint.id, title=complaint.title, description=complaint.description,
-                department=complaint.department, status="verified", priority=complaint.priority,
-                location=complaint.location, locationName=complaint.locationName
-            ))
-        db.query(Vote).filter(Vote.complaint_id == complaint_id).delete(synchronize_session=False)
-
-    elif vote_summary.get("not_resolved", 0) >= NOT_RESOLVED_THRESHOLD:
-        complaint.process = "community_verified" # A more descriptive status
-        db.query(Vote).filter(Vote.complaint_id == complaint_id).delete(synchronize_session=False)
-
-    # --- 4. Final Commit ---
-    db.commit()
-
-    return {"message": "Vote registered successfully", "complaint_status": complaint.status, "new_score": complaint.score}
+    return {"message": "Vote registered successfully", "complaint_status": outcome.status, "new_score": outcome.score}
 
 
 @router.get("/complaints/{complaint_id}/votes")
@@ -98,26 +50,37 @@ def get_vote_summary(complaint_id: int, db: Session = Depends(get_db)):
     complaint = db.query(models.Complaint).filter(models.Complaint.id == complaint_id).first()
     if not complaint:
         raise HTTPException(status_code=404, detail=f"Complaint with ID {complaint_id} not found.")
-    vote_counts = (db.query(models.Vote.vote_type, func.count(models.Vote.id)).filter(models.Vote.complaint_id == complaint_id).group_by(models.Vote.vote_type).all())
-    summary = {vote_type: count for vote_type, count in vote_counts}
     return {
         "complaint_id": complaint_id,
-        "resolved_count": summary.get("resolved", 0),
-        "not_resolved_count": summary.get("not_resolved", 0),
-        "total_votes": sum(summary.values())
+        "resolved_count": complaint.resolved_votes,
+        "not_resolved_count": complaint.not_resolved_votes,
+        "total_votes": complaint.resolved_votes + complaint.not_resolved_votes
     }
 
 @router.get("/pending")
-def get_pending_complaints(db: Session = Depends(get_db)):
-    """Fetches complaints with the 'pending verification' process status."""
-    complaints = db.query(Complaint).filter(Complaint.process == "pending_verification").all()
-    result = []
-    for c in complaints:
-        shapely_geom = to_shape(c.location) if c.location else None
-        location = {"lat": shapely_geom.y, "lon": shapely_geom.x} if shapely_geom else None
-        result.append({
-            "id": c.id, "title": c.title, "description": c.description,
-            "department": c.department, "status": c.status, "priority": c.priority,
-            "location": location, "locationName": c.locationName, "process": c.process,
-        })
-    return result
\ No newline at end of file
+def get_pending_complaints(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Fetches complaints with the 'pending verification' process status, newest
+    first. Answers If-None-Match with 304 while no complaint has changed.
+    """
+    etag = etags.compute(db, request, "complaints")
+    if etags.is_fresh(request, etag):
+        return etags.not_modified(etag)
+
+    def build():
+        rows, next_cursor = pagination.paginate(
+            db,
+            serializers.select_fields(Complaint, serializers.PENDING_FIELDS)
+            .where(Complaint.process_code == codes.PROCESS_PENDING_VERIFICATION),
+            pagination.COMPLAINTS_NEWEST_FIRST, limit, cursor,
+        )
+        return serializers.serialize_rows(rows, serializers.PENDING_FIELDS, location_style="latlon"), next_cursor
+
+    response = response_cache.respond(db, request, "complaints", build)
+    etags.set_etag(response, etag)
+    return response
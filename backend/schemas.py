@@ -41,6 +41,7 @@ class ComplaintResponse(ComplaintBase):
     id: int
     status: str
     image_url: Optional[str]
+    thumbnail_url: Optional[str] = None
     location: Optional[Dict[str, Any]]  # GeoJSON dict
     created_at: datetime
     locationName: Optional[str]
@@ -88,6 +89,14 @@ class VoteType(str, Enum):
     resolved = "Resolved"
     unresolved = "Unresolved"
 
+class BatchVoteItem(BaseModel):
+    user_id: int
+    complaint_id: int
+    vote_type: str  # "resolved" or "not_resolved"
+
+class BatchVoteCreate(BaseModel):
+    votes: List[BatchVoteItem] = Field(..., min_length=1, max_length=1000)
+
 class VoteCreate(BaseModel):
     user_id: int
     vote_type: str  # "verified" or "not_verified"
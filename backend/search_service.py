@@ -0,0 +1,107 @@
+# backend/search_service.py
+"""
+Complaint search.
+
+Full-text first: the query is parsed with websearch_to_tsquery (quoted
+phrases, OR, -exclusions) and matched against the generated search_vector
+column through its GIN index, ranked with ts_rank_cd. When that finds
+nothing, the query is retried as a fuzzy match on titles (pg_trgm word
+similarity, also GIN-indexed), which catches typos like "pothol" or
+"streetlite". Highlights are computed only for the rows of the page, and
+the complaint text in them is HTML-escaped around the <mark> tags.
+"""
+import html
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Float, func, literal
+from sqlalchemy.orm import Session
+
+import codes
+import pagination
+import serializers
+from models import Complaint
+
+SEARCH_CONFIG = "english"
+# ts_headline marks matches with private-use sentinels; highlight() escapes the
+# text and only then turns them into <mark> tags
+_START_SEL, _STOP_SEL = "\ue000", "\ue001"
+HEADLINE_OPTIONS = f"StartSel={_START_SEL}, StopSel={_STOP_SEL}, MaxWords=35, MinWords=15, MaxFragments=2"
+HIGHLIGHT_FIELDS = ("title_highlight", "description_highlight")
+
+SEARCH_COLUMNS = ("id", "title", "description", "department", "status", "priority", "process",
+                  "locationName", "created_at")
+SEARCH_FIELDS = SEARCH_COLUMNS + ("rank", "title_highlight", "description_highlight")
+MODE_HEADER = "X-Search-Mode"
+
+MODES = ("fulltext", "fuzzy")
+
+
+def _filtered(stmt, department: List[str], status: List[str]):
+    for vocabulary, code_column, label_column, values in (
+        (codes.DEPARTMENT, Complaint.department_code, Complaint.department, department),
+        (codes.STATUS, Complaint.status_code, Complaint.status, status),
+    ):
+        condition = codes.code_filter(vocabulary, code_column, label_column, values, partial=False)
+        if condition is not None:
+            stmt = stmt.where(condition)
+    return stmt
+
+
+def highlight(text: Optional[str]) -> Optional[str]:
+    """HTML-escapes a headline and turns its match sentinels into <mark> tags."""
+    if text is None:
+        return None
+    return html.escape(text).replace(_START_SEL, "<mark>").replace(_STOP_SEL, "</mark>")
+
+
+def _fulltext(q: str):
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = func.ts_rank_cd(Complaint.search_vector, query, type_=Float)
+    stmt = serializers.select_fields(Complaint, SEARCH_COLUMNS).add_columns(
+        rank.label("rank"),
+        func.ts_headline(SEARCH_CONFIG, Complaint.title, query, HEADLINE_OPTIONS).label("title_highlight"),
+        func.ts_headline(SEARCH_CONFIG, Complaint.description, query, HEADLINE_OPTIONS).label("description_highlight"),
+    ).where(Complaint.search_vector.op("@@")(query))
+    return stmt, rank
+
+
+def _fuzzy(q: str):
+    rank = func.word_similarity(q, Complaint.title, type_=Float)
+    stmt = serializers.select_fields(Complaint, SEARCH_COLUMNS).add_columns(
+        rank.label("rank"),
+        Complaint.title.label("title_highlight"),
+        literal(None).label("description_highlight"),
+    ).where(literal(q).op("<%")(Complaint.title))
+    return stmt, rank
+
+
+def search(
+    db: Session,
+    q: str,
+    department: List[str],
+    status: List[str],
+    limit: int,
+    cursor: Optional[str],
+    mode: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str], str]:
+    """
+    Returns (hits, next_cursor, mode). With no `mode`, full-text results are
+    returned when there are any, fuzzy title matches otherwise; later pages
+    must pass the mode of the first one (400 without it: the two modes rank on
+    different scales, so a cursor means nothing to the other one).
+    """
+    if cursor and not mode:
+        raise HTTPException(status_code=400, detail="mode is required with a cursor")
+    for candidate in ([mode] if mode else MODES):
+        stmt, rank = (_fulltext if candidate == "fulltext" else _fuzzy)(q)
+        stmt = _filtered(stmt, department, status)
+        keys = ((rank, True), (Complaint.id, False))
+        rows, next_cursor = pagination.paginate(db, stmt, keys, limit, cursor)
+        if rows or mode:
+            hits = serializers.serialize_rows(rows, SEARCH_FIELDS)
+            for hit in hits:
+                for field in HIGHLIGHT_FIELDS:
+                    hit[field] = highlight(hit[field])
+            return hits, next_cursor, candidate
+    return [], None, MODES[0]
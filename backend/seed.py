@@ -81,6 +81,7 @@ def seed_complaints():
         db.refresh(complaint)
 
         # 4. --- Calculate and save its initial score using the ranking service ---
+        ranking_service.assign_location_score(complaint, db)
         initial_score = ranking_service.calculate_priority_score(complaint, db)
         complaint.score = initial_score
         db.commit()
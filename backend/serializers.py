@@ -0,0 +1,116 @@
+# backend/serializers.py
+"""
+Shared complaint / verified-issue serialization.
+
+Endpoints select plain columns plus ST_X/ST_Y of the location through
+SQLAlchemy Core, and rows are turned into dicts in a single pass, so no ORM
+entities are built and no geometry goes through Shapely.
+"""
+import json
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+
+from database import SessionLocal
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_BATCH_SIZE = 1000
+# ?format= values accepted by the list endpoints that can stream
+FORMAT_PATTERN = "^(json|ndjson)$"
+
+# Field lists, in the order each endpoint has always returned them
+COMPLAINT_LIST_FIELDS = ("id", "title", "description", "department", "status", "process",
+                         "image_url", "thumbnail_url", "location", "created_at", "locationName")
+ADMIN_LIST_FIELDS = ("id", "user_id", "title", "description", "department", "status", "priority",
+                     "image_url", "thumbnail_url", "location", "locationName", "created_at", "process")
+FILTER_FIELDS = ("id", "title", "description", "department", "status", "priority", "process",
+                 "image_url", "thumbnail_url", "location", "created_at", "locationName")
+RANKED_FIELDS = ("score", "id", "title", "description", "department", "status", "image_url",
+                 "thumbnail_url", "location", "locationName", "created_at")
+PENDING_FIELDS = ("id", "title", "description", "department", "status", "priority",
+                  "location", "locationName", "process")
+VERIFIED_FIELDS = ("id", "title", "description", "department", "location", "created_at", "locationName")
+
+
+def select_fields(model, fields: Sequence[str]):
+    """
+    Core SELECT of just the columns `fields` needs. "location" becomes two
+    float columns (lon, lat) computed by PostGIS instead of a WKB blob.
+    """
+    columns = []
+    for name in fields:
+        if name == "location":
+            geom = func.geometry(model.location)
+            columns += [func.ST_X(geom).label("lon"), func.ST_Y(geom).label("lat")]
+        else:
+            columns.append(getattr(model, name).label(name))
+    return select(*columns)
+
+
+def _field_getter(name: str, image_base_url: Optional[str], location_style: str) -> Callable:
+    if name == "location":
+        if location_style == "latlon":
+            return lambda m: {"lat": m["lat"], "lon": m["lon"]} if m["lon"] is not None else None
+        return lambda m: {"type": "Point", "coordinates": (m["lon"], m["lat"])} if m["lon"] is not None else None
+    if name == "created_at":
+        return lambda m: m["created_at"].isoformat() if m["created_at"] else None
+    if name in ("image_url", "thumbnail_url") and image_base_url:
+        return lambda m: image_base_url + m[name].lstrip("/") if m[name] else None
+    return lambda m: m[name]
+
+
+def row_serializer(
+    fields: Sequence[str],
+    image_base_url: Optional[str] = None,
+    location_style: str = "geojson",
+) -> Callable:
+    """
+    Returns a function that builds the response dict for one Core row selected
+    with select_fields. image_base_url turns relative /uploads paths into
+    absolute URLs; location_style is "geojson" (Point) or "latlon" ({"lat", "lon"}).
+    """
+    getters: List[Tuple[str, Callable]] = [
+        (name, _field_getter(name, image_base_url, location_style)) for name in fields
+    ]
+    return lambda row: {name: get(row._mapping) for name, get in getters}
+
+
+def serialize_rows(
+    rows,
+    fields: Sequence[str],
+    image_base_url: Optional[str] = None,
+    location_style: str = "geojson",
+) -> List[dict]:
+    """Builds the response dicts for Core rows selected with select_fields."""
+    serialize = row_serializer(fields, image_base_url, location_style)
+    return [serialize(row) for row in rows]
+
+
+def stream_ndjson(
+    stmt,
+    fields: Sequence[str],
+    image_base_url: Optional[str] = None,
+    location_style: str = "geojson",
+    batch_size: int = STREAM_BATCH_SIZE,
+) -> Iterator[bytes]:
+    """
+    Yields `stmt`'s rows as newline-delimited JSON, `batch_size` rows per chunk.
+
+    Reads through a server-side cursor (yield_per), so memory stays flat and
+    the first chunk goes out as soon as the first batch arrives, whatever the
+    table size. Opens its own session: the request's session is closed before
+    a streaming body is sent.
+    """
+    serialize = row_serializer(fields, image_base_url, location_style)
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=batch_size))
+        for batch in result.partitions():
+            yield "".join(json.dumps(serialize(row), separators=(",", ":")) + "\n" for row in batch).encode()
+    finally:
+        db.close()
+
+
+def ndjson_response(stmt, fields: Sequence[str], headers: Optional[dict] = None, **options) -> StreamingResponse:
+    return StreamingResponse(stream_ndjson(stmt, fields, **options), media_type=NDJSON_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,230 @@
+# backend/tiles.py
+"""
+Mapbox Vector Tiles for complaints and verified issues, with an on-disk cache.
+
+Tiles are rendered by PostGIS (ST_AsMVT) and stored as
+TILE_CACHE_DIR/{z}/{x}/{y}.pbf. When a complaint changes, only the tiles that
+contain its point (one per zoom level, plus neighbours when the point sits in
+a tile's buffer) are deleted; every other cached tile stays valid.
+
+A tile rendered while a write was in flight could otherwise be stored after
+its invalidation, so each render is stamped with the complaints /
+verified_issues data versions and the file is dropped again if they moved.
+
+The cache is capped at TILE_CACHE_MAX_BYTES: serving a tile bumps its mtime,
+and once the cache outgrows the cap the least recently served tiles are
+evicted. Each worker counts the bytes it writes on top of the last directory
+scan and rescans at least every USAGE_SCAN_INTERVAL_S, so with several workers
+the cache may overshoot the cap briefly, never for long.
+"""
+import math
+import os
+import tempfile
+import threading
+import time
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import data_versions
+from config import settings
+
+MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+MAX_ZOOM = 22
+EXTENT = 4096
+# Points this many tile units outside a tile are still drawn in it, so markers
+# on a tile edge are not clipped
+BUFFER = 64
+
+Tile = Tuple[int, int, int]
+
+USAGE_SCAN_INTERVAL_S = 60.0
+# Eviction goes this far below the cap, so the next prune is not one tile away
+PRUNE_TO = 0.9
+
+# bytes / files as of the last scan plus this worker's writes since (None before the first scan)
+_usage = {"bytes": None, "files": None, "scanned_at": 0.0, "evicted": 0}
+_usage_lock = threading.Lock()
+_prune_lock = threading.Lock()
+
+
+def _tile_sql() -> str:
+    # The envelope is widened by the buffer so edge points land in both tiles
+    margin = BUFFER / EXTENT
+    return f"""
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(:z, :x, :y) AS merc,
+                   ST_Transform(ST_TileEnvelope(:z, :x, :y, margin => {margin}), 4326)::geography AS area
+        ), complaint_rows AS (
+            SELECT ST_AsMVTGeom(ST_Transform(c.location::geometry, 3857), bounds.merc, {EXTENT}, {BUFFER}) AS geom,
+                   c.id, c.title, c.department, c.status, c.priority, c.process
+            FROM complaints c, bounds
+            WHERE c.location && bounds.area
+        ), verified_rows AS (
+            SELECT ST_AsMVTGeom(ST_Transform(v.location::geometry, 3857), bounds.merc, {EXTENT}, {BUFFER}) AS geom,
+                   v.id, v.complaint_id, v.title, v.department, v.priority
+            FROM verified_issues v, bounds
+            WHERE v.location && bounds.area
+        )
+        SELECT COALESCE((SELECT ST_AsMVT(complaint_rows, 'complaints', {EXTENT}, 'geom') FROM complaint_rows), ''::bytea)
+            || COALESCE((SELECT ST_AsMVT(verified_rows, 'verified_issues', {EXTENT}, 'geom') FROM verified_rows), ''::bytea)
+    """
+
+
+def is_valid(z: int, x: int, y: int) -> bool:
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def tile_path(z: int, x: int, y: int) -> str:
+    return os.path.join(settings.TILE_CACHE_DIR, str(z), str(x), f"{y}.pbf")
+
+
+def _versions(db: Session) -> Tuple[int, int]:
+    return (data_versions.current_version(db, "complaints"),
+            data_versions.current_version(db, "verified_issues"))
+
+
+def render(db: Session, z: int, x: int, y: int) -> bytes:
+    return bytes(db.execute(text(_tile_sql()), {"z": z, "x": x, "y": y}).scalar_one())
+
+
+def _store(path: str, data: bytes) -> None:
+    # Write-then-rename so readers never see a half-written tile
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    with _usage_lock:
+        if _usage["bytes"] is not None:
+            _usage["bytes"] += len(data)
+            _usage["files"] += 1
+
+
+def _scan() -> List[Tuple[float, int, str]]:
+    """(mtime, size, path) of every cached tile."""
+    entries = []
+    for dirpath, _, filenames in os.walk(settings.TILE_CACHE_DIR):
+        for name in filenames:
+            if not name.endswith(".pbf"):
+                continue
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+    return entries
+
+
+def prune() -> int:
+    """
+    Rescans the cache and, if it is over TILE_CACHE_MAX_BYTES, evicts the
+    least recently served tiles down to PRUNE_TO of the cap. Returns how many
+    tiles were evicted.
+    """
+    entries = _scan()
+    total = sum(size for _, size, _ in entries)
+    files = len(entries)
+    evicted = 0
+    if total > settings.TILE_CACHE_MAX_BYTES:
+        target = settings.TILE_CACHE_MAX_BYTES * PRUNE_TO
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            evicted += _discard(path)
+            total -= size
+            files -= 1
+    with _usage_lock:
+        _usage.update(bytes=total, files=files, scanned_at=time.monotonic())
+        _usage["evicted"] += evicted
+    return evicted
+
+
+def _maybe_prune() -> None:
+    due = (_usage["bytes"] is None or _usage["bytes"] > settings.TILE_CACHE_MAX_BYTES
+           or time.monotonic() - _usage["scanned_at"] > USAGE_SCAN_INTERVAL_S)
+    # One scan at a time per worker; other requests go on without waiting for it
+    if due and _prune_lock.acquire(blocking=False):
+        try:
+            prune()
+        finally:
+            _prune_lock.release()
+
+
+def stats() -> dict:
+    """Cache usage for /admin/tiles; bytes and files are None until this worker has scanned the cache."""
+    with _usage_lock:
+        return {
+            "dir": settings.TILE_CACHE_DIR,
+            "max_zoom": settings.TILE_CACHE_MAX_ZOOM,
+            "max_bytes": settings.TILE_CACHE_MAX_BYTES,
+            "bytes": _usage["bytes"],
+            "files": _usage["files"],
+            "evicted": _usage["evicted"],
+        }
+
+
+def get_tile(db: Session, z: int, x: int, y: int) -> Tuple[bytes, bool]:
+    """Returns (tile bytes, served_from_cache)."""
+    cacheable = z <= settings.TILE_CACHE_MAX_ZOOM
+    path = tile_path(z, x, y)
+    if cacheable:
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # Marks the tile as recently used for prune()
+            os.utime(path)
+            return data, True
+        except FileNotFoundError:
+            pass
+
+    before = _versions(db) if cacheable else None
+    data = render(db, z, x, y)
+    if cacheable:
+        _store(path, data)
+        if _versions(db) != before:
+            # A write committed while we rendered; its invalidation may have run
+            # before our file existed, so drop it and let the next request re-render
+            _discard(path)
+        _maybe_prune()
+    return data, False
+
+
+def _discard(path: str) -> bool:
+    try:
+        os.unlink(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def covering_tiles(lon: float, lat: float, max_zoom: Optional[int] = None) -> Iterator[Tile]:
+    """Every cached tile whose buffered area contains the point, for zooms 0..max_zoom."""
+    max_zoom = settings.TILE_CACHE_MAX_ZOOM if max_zoom is None else max_zoom
+    lat = max(min(lat, 85.0511287798), -85.0511287798)
+    fx = (lon + 180.0) / 360.0
+    fy = (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0
+    margin = BUFFER / EXTENT
+    for z in range(max_zoom + 1):
+        n = 2 ** z
+        px, py = fx * n, fy * n
+        xs = range(max(int(math.floor(px - margin)), 0), min(int(math.floor(px + margin)), n - 1) + 1)
+        ys = range(max(int(math.floor(py - margin)), 0), min(int(math.floor(py + margin)), n - 1) + 1)
+        for x in xs:
+            for y in ys:
+                yield z, x, y
+
+
+def invalidate_points(points: Iterable[Tuple[float, float]]) -> int:
+    """Deletes the cached tiles that show any of the (lon, lat) points. Returns how many were removed."""
+    tiles: Set[Tile] = set()
+    for lon, lat in points:
+        tiles.update(covering_tiles(lon, lat))
+    return sum(_discard(tile_path(*tile)) for tile in tiles)
@@ -0,0 +1,324 @@
+# backend/uploads.py
+"""
+Streaming, content-addressed image uploads.
+
+UploadSizeLimit turns away request bodies that can't fit MAX_UPLOAD_BYTES
+before the multipart parser buffers them. The upload is then read in
+fixed-size chunks; each chunk is size-checked, hashed (SHA-256) and written to
+a temp file in UPLOAD_STAGING_DIR (outside the served UPLOAD_DIR) off the event
+loop. The real image type is sniffed from the first bytes instead of trusting
+the client's content type or file name.
+
+Stored images are named by their hash (UPLOAD_DIR/ab/abcd...ef.jpg), so the
+same photo uploaded twice is kept once, and a URL always means the same bytes
+and can be cached forever. The upload_blobs table counts the complaints that
+reference each image: store() takes a reference, place() moves the temp file
+into place once that reference is committed, release() drops one, and
+collect_garbage() deletes the images nobody references any more, with their
+resized copies. collect_garbage() only touches images without a committed
+reference and skips rows another transaction holds, so it can't remove an
+image that is being stored.
+"""
+import glob
+import hashlib
+import os
+import re
+import tempfile
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from fastapi.staticfiles import StaticFiles
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from config import settings
+
+CHUNK_SIZE = 256 * 1024
+# Room for the other form fields and multipart framing next to the image
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+# Leading bytes -> (content type, extension)
+SIGNATURES = (
+    (b"\xff\xd8\xff", ("image/jpeg", ".jpg")),
+    (b"\x89PNG\r\n\x1a\n", ("image/png", ".png")),
+    (b"GIF87a", ("image/gif", ".gif")),
+    (b"GIF89a", ("image/gif", ".gif")),
+)
+# Extension -> content type, for images already stored under their hash
+CONTENT_TYPES = {**{extension: content_type for _, (content_type, extension) in SIGNATURES}, ".webp": "image/webp"}
+
+
+URL_PREFIX = "/uploads/"
+# Content-addressed URLs never change meaning, so browsers may keep them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+_BLOB_PATH = re.compile(r"^([0-9a-f]{2})/(\1[0-9a-f]{62})\.(jpg|png|gif|webp)$")
+# Resized copies made by derivatives.py, named after the original's hash
+DERIVED_DIR = "derived"
+_DERIVED_PATH = re.compile(r"^derived/([0-9a-f]{2})/(\1[0-9a-f]{62})-[a-z]+\.(jpg|webp)$")
+
+
+@dataclass
+class StagedUpload:
+    """A received image waiting in its temp file until place() moves it into place."""
+    tmp_path: str
+    sha256: str
+    size: int
+    content_type: str
+    extension: str
+
+    @property
+    def relpath(self) -> str:
+        return blob_relpath(self.sha256, self.extension)
+
+    @property
+    def url(self) -> str:
+        return URL_PREFIX + self.relpath
+
+
+def blob_relpath(sha256: str, extension: str) -> str:
+    """Path of an image inside UPLOAD_DIR, fanned out by the first hash byte."""
+    return f"{sha256[:2]}/{sha256}{extension}"
+
+
+def derived_relpath(sha256: str, size: str, extension: str) -> str:
+    """Path inside UPLOAD_DIR of the `size` version of an image, e.g. derived/ab/abcd...ef-thumb.webp."""
+    return f"{DERIVED_DIR}/{sha256[:2]}/{sha256}-{size}{extension}"
+
+
+def hash_file(path: str) -> Tuple[str, Optional[Tuple[str, str]]]:
+    """(SHA-256, sniffed (content type, extension)) of an image already on disk."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        chunk = f.read(CHUNK_SIZE)
+        kind = sniff(chunk)
+        while chunk:
+            digest.update(chunk)
+            chunk = f.read(CHUNK_SIZE)
+    return digest.hexdigest(), kind
+
+
+def blob_sha256(url_or_relpath: Optional[str]) -> Optional[str]:
+    """The hash a content-addressed image URL (or UPLOAD_DIR path) names, None for anything else."""
+    if not url_or_relpath:
+        return None
+    if url_or_relpath.startswith(URL_PREFIX):
+        url_or_relpath = url_or_relpath[len(URL_PREFIX):]
+    match = _BLOB_PATH.match(url_or_relpath)
+    return match.group(2) if match else None
+
+
+def sniff(head: bytes) -> Optional[Tuple[str, str]]:
+    """(content type, extension) of an image from its first bytes, None if it is not one we accept."""
+    for signature, kind in SIGNATURES:
+        if head.startswith(signature):
+            return kind
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", ".webp"
+    return None
+
+
+class UploadMetrics:
+    """Counters and recent per-upload latency / throughput for /admin/uploads."""
+
+    def __init__(self, window: int = 500):
+        self.uploads = 0
+        self.deduplicated = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.rejected = {}
+        self._latencies = deque(maxlen=window)
+
+    def record(self, size: int, seconds: float) -> None:
+        self.uploads += 1
+        self.bytes += size
+        self.seconds += seconds
+        self._latencies.append(seconds)
+
+    def reject(self, reason: str) -> None:
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+
+    def stats(self) -> dict:
+        latencies = sorted(self._latencies)
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 2) if latencies else None
+
+        return {
+            "uploads": self.uploads,
+            "deduplicated": self.deduplicated,
+            "bytes": self.bytes,
+            "rejected": dict(self.rejected),
+            "throughput_mb_s": round(self.bytes / self.seconds / 2**20, 2) if self.seconds else None,
+            "latency_ms_p50": percentile(0.5),
+            "latency_ms_p95": percentile(0.95),
+        }
+
+
+metrics = UploadMetrics()
+
+
+def _reject(status_code: int, reason: str, detail: str) -> HTTPException:
+    metrics.reject(reason)
+    return HTTPException(status_code=status_code, detail=detail)
+
+
+async def stage_image(upload: UploadFile) -> StagedUpload:
+    """
+    Streams `upload` into a temp file in UPLOAD_STAGING_DIR and returns it with
+    its hash. Raises 413 when it exceeds MAX_UPLOAD_BYTES (a backstop for
+    UploadSizeLimit), 415 when it is not a
+    JPEG/PNG/GIF/WebP image. The caller must store() and place() the result,
+    and discard() it in any case.
+    """
+    start = time.perf_counter()
+    limit = settings.MAX_UPLOAD_BYTES
+    if upload.size is not None and upload.size > limit:
+        raise _reject(413, "too_large", f"Image is larger than {limit} bytes")
+
+    os.makedirs(settings.UPLOAD_STAGING_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=settings.UPLOAD_STAGING_DIR, suffix=".part")
+    digest = hashlib.sha256()
+    size = 0
+    kind = None
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await upload.read(CHUNK_SIZE):
+                if kind is None:
+                    kind = sniff(chunk)
+                    if kind is None:
+                        raise _reject(415, "not_an_image", "Upload must be a JPEG, PNG, GIF or WebP image")
+                size += len(chunk)
+                if size > limit:
+                    raise _reject(413, "too_large", f"Image is larger than {limit} bytes")
+                digest.update(chunk)
+                await run_in_threadpool(out.write, chunk)
+        if kind is None:
+            raise _reject(400, "empty", "Uploaded image is empty")
+        # mkstemp creates 0600 files; uploads are public
+        os.chmod(tmp_path, 0o644)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    metrics.record(size, time.perf_counter() - start)
+    content_type, extension = kind
+    return StagedUpload(tmp_path, digest.hexdigest(), size, content_type, extension)
+
+
+def discard(staged: StagedUpload) -> None:
+    """Removes the temp file of an upload that was not (or not yet) placed."""
+    if os.path.exists(staged.tmp_path):
+        os.unlink(staged.tmp_path)
+
+
+def store(db: Session, staged: StagedUpload) -> str:
+    """
+    Takes a reference to the image in `db`'s transaction and returns its URL.
+    The image stays in its temp file: call place() after the commit, so a
+    rolled-back transaction leaves no unreferenced image behind. Sync Session
+    code; async routes call it through AsyncSession.run_sync.
+    """
+    db.execute(text(
+        "INSERT INTO upload_blobs (sha256, path, size, content_type, refcount) "
+        "VALUES (:sha256, :path, :size, :content_type, 1) "
+        "ON CONFLICT (sha256) DO UPDATE SET refcount = upload_blobs.refcount + 1"
+    ), {"sha256": staged.sha256, "path": staged.relpath, "size": staged.size, "content_type": staged.content_type})
+    return staged.url
+
+
+def place(staged: StagedUpload) -> None:
+    """
+    Moves a stored upload into its content-addressed place, or drops the temp
+    file when that image is already there. Call it once store()'s reference is
+    committed: collect_garbage leaves referenced images alone.
+    """
+    path = os.path.join(settings.UPLOAD_DIR, staged.relpath)
+    if os.path.exists(path):
+        discard(staged)
+        metrics.deduplicated += 1
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(staged.tmp_path, path)
+
+
+def release(db: Session, image_url: Optional[str]) -> None:
+    """Drops one reference to a content-addressed image, in `db`'s transaction."""
+    sha256 = blob_sha256(image_url)
+    if sha256 is None:
+        return
+    db.execute(
+        text("UPDATE upload_blobs SET refcount = refcount - 1 WHERE sha256 = :sha256 AND refcount > 0"),
+        {"sha256": sha256},
+    )
+
+
+def collect_garbage(db: Session) -> int:
+    """
+    Deletes the images no complaint references any more, with their rows, and
+    returns how many. Blobs another transaction is re-acquiring are skipped;
+    the caller commits.
+    """
+    rows = db.execute(text(
+        "SELECT sha256, path FROM upload_blobs WHERE refcount = 0 FOR UPDATE SKIP LOCKED"
+    )).all()
+    for sha256, path in rows:
+        derived = glob.glob(os.path.join(settings.UPLOAD_DIR, derived_relpath(sha256, "*", ".*")))
+        for full_path in [os.path.join(settings.UPLOAD_DIR, path)] + derived:
+            if os.path.exists(full_path):
+                os.unlink(full_path)
+    if rows:
+        db.execute(text("DELETE FROM upload_blobs WHERE sha256 = ANY(:hashes)"), {"hashes": [r.sha256 for r in rows]})
+    return len(rows)
+
+
+class UploadSizeLimit:
+    """
+    ASGI middleware rejecting oversized bodies on the upload routes with 413
+    before anything parses them: at once when Content-Length is too large,
+    otherwise (chunked bodies) as soon as the bytes received pass the limit.
+    """
+
+    def __init__(self, app, paths: Tuple[str, ...]):
+        self.app = app
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+        limit = settings.MAX_UPLOAD_BYTES + FORM_OVERHEAD_BYTES
+        detail = f"Image is larger than {settings.MAX_UPLOAD_BYTES} bytes"
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            metrics.reject("too_large")
+            return await JSONResponse({"detail": detail}, status_code=413)(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised inside the route's body parsing, which re-raises HTTPExceptions
+                    raise _reject(413, "too_large", detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+class UploadFiles(StaticFiles):
+    """StaticFiles for UPLOAD_DIR that marks content-addressed images (and their resized copies) as immutable."""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        relpath = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+        if blob_sha256(relpath) is not None or _DERIVED_PATH.match(relpath):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
@@ -0,0 +1,298 @@
+# backend/vote_service.py
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import data_changes
+import ranking_service
+from models import Complaint
+
+# --- Consolidated Vote Thresholds ---
+RESOLVED_THRESHOLD = 3
+NOT_RESOLVED_THRESHOLD = 3
+PRIORITY_HIGH_THRESHOLD = 3
+PRIORITY_CRITICAL_THRESHOLD = 6
+
+VALID_VOTE_TYPES = ("resolved", "not_resolved")
+
+
+@dataclass
+class VoteOutcome:
+    complaint_id: int
+    status: Optional[str]
+    score: float
+    resolved_votes: int
+    not_resolved_votes: int
+
+
+def _counter_update_sql(source: str, resolved_inc: str, not_resolved_inc: str) -> str:
+    """
+    UPDATE that applies vote increments from `source` to complaints: bumps the
+    counters, escalates priority and rescores in place. Runs under the row lock,
+    so concurrent votes on the same complaint see each other's increments.
+    """
+    new_not_resolved = f"c.not_resolved_votes + {not_resolved_inc}"
+    score = ranking_service.priority_score_sql("c.department", new_not_resolved, "c.location_score")
+    return f"""
+        UPDATE complaints c
+        SET resolved_votes = c.resolved_votes + {resolved_inc},
+            not_resolved_votes = {new_not_resolved},
+            priority = CASE
+                WHEN {not_resolved_inc} = 0 THEN c.priority
+                WHEN {new_not_resolved} >= {PRIORITY_CRITICAL_THRESHOLD} THEN 'critical'
+                WHEN {new_not_resolved} >= {PRIORITY_HIGH_THRESHOLD}
+                     AND COALESCE(c.priority, '') NOT IN ('high', 'critical') THEN 'high'
+                ELSE c.priority
+            END,
+            -- Only not_resolved votes feed the score
+            score = CASE WHEN {not_resolved_inc} = 0 THEN c.score ELSE {score} END
+        FROM {source}
+        WHERE c.id = {source}.complaint_id
+        RETURNING c.id, c.status, c.score, c.resolved_votes, c.not_resolved_votes, c.location_score
+    """
+
+
+def _cast_vote_sql() -> str:
+    # The insert only happens when both the complaint and the user exist; the
+    # unique constraint turns a duplicate into "no row" instead of a race.
+    return f"""
+        WITH new_vote AS (
+            INSERT INTO votes (user_id, complaint_id, vote_type, voted_at)
+            SELECT :user_id, :complaint_id, :vote_type, now()
+            WHERE EXISTS (SELECT 1 FROM complaints WHERE id = :complaint_id)
+              AND EXISTS (SELECT 1 FROM users WHERE id = :user_id)
+            ON CONFLICT ON CONSTRAINT unique_user_complaint_vote DO NOTHING
+            RETURNING complaint_id
+        )
+        {_counter_update_sql(
+            "new_vote",
+            "CAST(:vote_type = 'resolved' AS integer)",
+            "CAST(:vote_type = 'not_resolved' AS integer)",
+        )}
+    """
+
+
+def _raise_rejected_vote(db: Session, complaint_id: int, user_id: int) -> None:
+    """Cold path: works out why the vote insert matched nothing."""
+    complaint_exists, user_exists = db.execute(
+        text("""
+            SELECT EXISTS (SELECT 1 FROM complaints WHERE id = :complaint_id),
+                   EXISTS (SELECT 1 FROM users WHERE id = :user_id)
+        """),
+        {"complaint_id": complaint_id, "user_id": user_id},
+    ).one()
+    db.rollback()
+    if not complaint_exists:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    if not user_exists:
+        raise HTTPException(status_code=404, detail=f"User with ID {user_id} not found")
+    raise HTTPException(status_code=400, detail="User has already voted on this complaint")
+
+
+def _rescore_uncached(db: Session, complaint_id: int) -> float:
+    """Complaints created before location scores were cached get them filled in once here."""
+    complaint = db.get(Complaint, complaint_id)
+    ranking_service.assign_location_score(complaint, db)
+    complaint.score = ranking_service.calculate_priority_score(complaint, db)
+    db.flush()
+    return complaint.score
+
+
+def apply_thresholds(db: Session, outcome: VoteOutcome) -> VoteOutcome:
+    """
+    Applies the community-verification transitions once a counter crosses its
+    threshold: one statement that updates the complaint, records the verified
+    issue (if resolved) and clears the votes. Runs in the caller's transaction.
+    """
+    params = {"complaint_id": outcome.complaint_id}
+    if outcome.resolved_votes >= RESOLVED_THRESHOLD:
+        db.execute(text("""
+            WITH closed AS (
+                UPDATE complaints
+                SET status = 'Resolved', process = 'verified_resolved',
+                    resolved_votes = 0, not_resolved_votes = 0
+                WHERE id = :complaint_id
+                RETURNING id, title, description, department, priority, location, "locationName"
+            ), verified AS (
+                INSERT INTO verified_issues
+                    (complaint_id, title, description, department, status, priority, location, "locationName")
+                SELECT id, title, description, department, 'verified', priority, location, "locationName"
+                FROM closed
+                ON CONFLICT (complaint_id) DO NOTHING
+            )
+            DELETE FROM votes WHERE complaint_id = :complaint_id
+        """), params)
+        outcome.status = "Resolved"
+        outcome.resolved_votes = outcome.not_resolved_votes = 0
+
+    elif outcome.not_resolved_votes >= NOT_RESOLVED_THRESHOLD:
+        db.execute(text("""
+            WITH verified AS (
+                UPDATE complaints
+                SET process = 'community_verified', resolved_votes = 0, not_resolved_votes = 0
+                WHERE id = :complaint_id
+            )
+            DELETE FROM votes WHERE complaint_id = :complaint_id
+        """), params)
+        outcome.resolved_votes = outcome.not_resolved_votes = 0
+
+    return outcome
+
+
+def cast_vote(db: Session, complaint_id: int, user_id: int, vote_type: str) -> VoteOutcome:
+    """
+    Records one vote and applies its effects. The hot path is a single statement
+    (INSERT ... ON CONFLICT DO NOTHING feeding a row-locked counter UPDATE);
+    threshold transitions add one more statement only when a threshold is crossed.
+    Commits on success.
+    """
+    if vote_type not in VALID_VOTE_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid vote type")
+
+    row = db.execute(
+        text(_cast_vote_sql()),
+        {"complaint_id": complaint_id, "user_id": user_id, "vote_type": vote_type},
+    ).first()
+    if row is None:
+        _raise_rejected_vote(db, complaint_id, user_id)
+
+    outcome = VoteOutcome(
+        complaint_id=row.id, status=row.status, score=row.score,
+        resolved_votes=row.resolved_votes, not_resolved_votes=row.not_resolved_votes,
+    )
+    if vote_type == "not_resolved" and row.location_score is None:
+        outcome.score = _rescore_uncached(db, row.id)
+
+    apply_thresholds(db, outcome)
+    db.commit()
+    data_changes.complaints_changed(db, [outcome.complaint_id], verified=outcome.status == "Resolved")
+    return outcome
+
+
+def _cast_votes_sql() -> str:
+    # Complaint rows are locked in id order up front so concurrent batches
+    # touching overlapping complaints cannot deadlock each other.
+    return f"""
+        WITH incoming AS (
+            SELECT *
+            FROM unnest(
+                CAST(:user_ids AS integer[]), CAST(:complaint_ids AS integer[]), CAST(:vote_types AS text[])
+            ) AS t(user_id, complaint_id, vote_type)
+        ), locked AS (
+            SELECT id FROM complaints
+            WHERE id = ANY(CAST(:complaint_ids AS integer[]))
+            ORDER BY id
+            FOR UPDATE
+        ), new_votes AS (
+            INSERT INTO votes (user_id, complaint_id, vote_type, voted_at)
+            SELECT i.user_id, i.complaint_id, i.vote_type, now()
+            FROM incoming i
+            JOIN locked ON locked.id = i.complaint_id
+            JOIN users u ON u.id = i.user_id
+            ON CONFLICT ON CONSTRAINT unique_user_complaint_vote DO NOTHING
+            RETURNING user_id, complaint_id
+        ), tallies AS (
+            SELECT v.complaint_id,
+                   COUNT(*) FILTER (WHERE i.vote_type = 'resolved') AS resolved_inc,
+                   COUNT(*) FILTER (WHERE i.vote_type = 'not_resolved') AS not_resolved_inc
+            FROM new_votes v
+            JOIN incoming i ON i.user_id = v.user_id AND i.complaint_id = v.complaint_id
+            GROUP BY v.complaint_id
+        ), updated AS (
+            {_counter_update_sql("tallies", "tallies.resolved_inc", "tallies.not_resolved_inc")}
+        )
+        SELECT v.user_id, v.complaint_id, u.status, u.score,
+               u.resolved_votes, u.not_resolved_votes, u.location_score
+        FROM new_votes v
+        JOIN updated u ON u.id = v.complaint_id
+    """
+
+
+def _rejection_reasons(db: Session, items: List[Tuple[int, int, str]]) -> Dict[Tuple[int, int], str]:
+    """Cold path: explains, per (user_id, complaint_id), why a batch item was not inserted."""
+    existing_complaints, existing_users = db.execute(
+        text("""
+            SELECT ARRAY(SELECT id FROM complaints WHERE id = ANY(CAST(:complaint_ids AS integer[]))),
+                   ARRAY(SELECT id FROM users WHERE id = ANY(CAST(:user_ids AS integer[])))
+        """),
+        {"complaint_ids": [c for _, c, _ in items], "user_ids": [u for u, _, _ in items]},
+    ).one()
+    existing_complaints, existing_users = set(existing_complaints), set(existing_users)
+    reasons = {}
+    for user_id, complaint_id, _ in items:
+        if complaint_id not in existing_complaints:
+            reasons[(user_id, complaint_id)] = "Complaint not found"
+        elif user_id not in existing_users:
+            reasons[(user_id, complaint_id)] = f"User with ID {user_id} not found"
+        else:
+            reasons[(user_id, complaint_id)] = "User has already voted on this complaint"
+    return reasons
+
+
+def cast_votes(db: Session, votes: List[Tuple[int, int, str]]) -> List[dict]:
+    """
+    Records many (user_id, complaint_id, vote_type) votes at once: dedupes them,
+    bulk-inserts in one statement that also updates each affected complaint's
+    counters once, then evaluates the thresholds once per complaint.
+    Returns one result per input item, in order. Commits.
+    """
+    results: List[dict] = []
+    unique: "OrderedDict[Tuple[int, int], str]" = OrderedDict()
+    for user_id, complaint_id, vote_type in votes:
+        result = {"user_id": user_id, "complaint_id": complaint_id, "vote_type": vote_type, "accepted": False}
+        results.append(result)
+        if vote_type not in VALID_VOTE_TYPES:
+            result["detail"] = "Invalid vote type"
+        elif (user_id, complaint_id) in unique:
+            result["detail"] = "Duplicate vote in batch"
+        else:
+            unique[(user_id, complaint_id)] = vote_type
+
+    if not unique:
+        return results
+
+    items = [(user_id, complaint_id, vote_type) for (user_id, complaint_id), vote_type in unique.items()]
+    rows = db.execute(text(_cast_votes_sql()), {
+        "user_ids": [u for u, _, _ in items],
+        "complaint_ids": [c for _, c, _ in items],
+        "vote_types": [t for _, _, t in items],
+    }).all()
+
+    inserted = {(row.user_id, row.complaint_id) for row in rows}
+    # Only the not_resolved tally feeds the score, as in cast_vote
+    not_resolved_changed = {c for u, c in inserted if unique[(u, c)] == "not_resolved"}
+    outcomes: Dict[int, VoteOutcome] = {}
+    for row in rows:
+        if row.complaint_id not in outcomes:
+            outcomes[row.complaint_id] = VoteOutcome(
+                complaint_id=row.complaint_id, status=row.status, score=row.score,
+                resolved_votes=row.resolved_votes, not_resolved_votes=row.not_resolved_votes,
+            )
+            if row.location_score is None and row.complaint_id in not_resolved_changed:
+                outcomes[row.complaint_id].score = _rescore_uncached(db, row.complaint_id)
+
+    for outcome in outcomes.values():
+        apply_thresholds(db, outcome)
+
+    rejected = [item for item in items if (item[0], item[1]) not in inserted]
+    reasons = _rejection_reasons(db, rejected) if rejected else {}
+    db.commit()
+    if outcomes:
+        data_changes.complaints_changed(
+            db, outcomes.keys(), verified=any(o.status == "Resolved" for o in outcomes.values())
+        )
+
+    for result in results:
+        key = (result["user_id"], result["complaint_id"])
+        if "detail" in result:
+            continue
+        if key in inserted:
+            outcome = outcomes[result["complaint_id"]]
+            result.update(accepted=True, complaint_status=outcome.status, new_score=outcome.score)
+        else:
+            result["detail"] = reasons[key]
+    return results